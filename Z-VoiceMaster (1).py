@@ -1,10 +1,20 @@
 import discord
 from discord.ext import commands
 from discord.ui import Button, View, Select, Modal, TextInput
+from aiohttp import web
 import asyncio
+import functools
+import io
 import json
 import os
 import base64
+import datetime
+import heapq
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
 
 ACTIVITIES = {
     "YouTube Together": "880218394199220334",
@@ -18,6 +28,125 @@ ACTIVITIES = {
     "Poker Night": "755827207812677713",
 }
 
+RECONCILE_INTERVAL = int(os.getenv("ZVM_RECONCILE_INTERVAL", "3600"))
+ORPHAN_MIN_AGE = 60
+METRICS_PORT = int(os.getenv("ZVM_METRICS_PORT", "0"))
+METRICS_ENABLED = METRICS_PORT > 0 or os.getenv("ZVM_METRICS", "0") == "1"
+SETTINGS_FILE = os.getenv("ZVM_SETTINGS_FILE", "data/z-voicemaster.json")
+SESSIONS_FILE = os.getenv("ZVM_SESSIONS_DB", "data/z-voicemaster-sessions.db")
+SHARED_STATE = os.getenv("ZVM_SHARED_STATE", "0") == "1"
+SYNC_INTERVAL = float(os.getenv("ZVM_SYNC_INTERVAL", "1"))
+DEBOUNCE_WINDOW = float(os.getenv("ZVM_DEBOUNCE_WINDOW", "0.5"))
+HOP_THRESHOLD = int(os.getenv("ZVM_HOP_THRESHOLD", "10"))
+HOP_PERIOD = 30.0
+HOP_COOLDOWN = float(os.getenv("ZVM_HOP_COOLDOWN", "10"))
+IDLE_SWEEP_INTERVAL = int(os.getenv("ZVM_IDLE_SWEEP_INTERVAL", "60"))
+IDLE_SWEEP_BATCH = 500
+MISSING_CACHE_SIZE = 100000
+MIN_EMPTY_GRACE = 1
+DEFAULT_IDLE_TIMEOUT = 0
+
+class Metrics:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = []
+
+    def observe(self, name, value, **labels):
+        if not self.enabled: return
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * len(self.BUCKETS), 0.0, 0]
+        for index, bound in enumerate(self.BUCKETS):
+            if value <= bound: histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled: return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels: return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+    def render(self):
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in sorted(self.histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f"{name}_bucket{self._labels(labels + (('le', bound),))} {bucket_count}")
+            lines.append(f"{name}_bucket{self._labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        families = {}
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                families.setdefault(name, []).append((tuple(sorted(labels.items())), value))
+        for name, samples in families.items():
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+            for labels, value in samples:
+                lines.append(f"{name}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics(enabled=METRICS_ENABLED)
+
+def timed(name, **labels):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not metrics.enabled: return await func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
+def locked(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return func(self, *args, **kwargs)
+    return wrapper
+
+MAX_CREATORS = 10
+DEFAULT_CREATOR = {
+    "creator_channel_id": None, "creator_channel_name": "➕ Join to Create", "category_id": None,
+    "default_limit": 0, "default_hidden": False, "name_template": "{user}'s Channel"
+}
+
+def migrate_settings(settings):
+    if 'creators' not in settings:
+        creator = dict(DEFAULT_CREATOR)
+        for key in ('creator_channel_id', 'creator_channel_name', 'category_id', 'default_limit', 'default_hidden'):
+            if key in settings: creator[key] = settings.pop(key)
+        settings['creators'] = [creator] if creator['category_id'] else []
+    return settings
+
+def render_channel_name(template, member):
+    return template.get('name_template', DEFAULT_CREATOR['name_template']).replace("{user}", member.display_name)[:100]
+
 class ConfigModal(Modal):
     def __init__(self, title, label, placeholder, current_value, callback):
         super().__init__(title=title)
@@ -64,57 +193,83 @@ class ControlPanelView(View):
     async def get_user_channels(self, interaction: discord.Interaction):
         owner_id = self.cog.get_owner_of_channel(interaction.channel_id)
         if not owner_id: return None, None
-        info = self.cog.user_channels.get(owner_id)
-        if not info: return None, None
-        voice_channel = interaction.guild.get_channel(info['voice_channel_id'])
-        text_channel = interaction.guild.get_channel(info['text_channel_id'])
+        session = self.cog.user_channels.get(owner_id)
+        if not session: return None, None
+        voice_channel = interaction.guild.get_channel(session.voice_channel_id)
+        text_channel = interaction.guild.get_channel(session.text_channel_id)
         return voice_channel, text_channel
 
+    async def submit(self, interaction, route, func, *args, **kwargs):
+        try:
+            await self.cog.rest_scheduler.submit(interaction.guild_id, route, func, *args, **kwargs)
+            return True
+        except RestQueueFull:
+            await interaction.followup.send("The bot is busy right now. Please try again in a moment.", ephemeral=True)
+        except discord.HTTPException:
+            await interaction.followup.send("Discord rejected that change. Please try again.", ephemeral=True)
+        return False
+
     @discord.ui.button(emoji="🔒", style=discord.ButtonStyle.secondary, custom_id="zvm:lock", row=0)
+    @timed("zvm_button_seconds", button="lock")
     async def lock(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc:
-            await vc.set_permissions(i.guild.default_role, connect=False)
-            await i.response.send_message("🔒 Channel locked.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'permissions', vc.set_permissions, i.guild.default_role, connect=False):
+                await i.followup.send("🔒 Channel locked.", ephemeral=True)
 
     @discord.ui.button(emoji="🔓", style=discord.ButtonStyle.secondary, custom_id="zvm:unlock", row=0)
+    @timed("zvm_button_seconds", button="unlock")
     async def unlock(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc:
-            await vc.set_permissions(i.guild.default_role, connect=None)
-            await i.response.send_message("🔓 Channel unlocked.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'permissions', vc.set_permissions, i.guild.default_role, connect=None):
+                await i.followup.send("🔓 Channel unlocked.", ephemeral=True)
 
     @discord.ui.button(emoji="👻", style=discord.ButtonStyle.secondary, custom_id="zvm:hide", row=0)
+    @timed("zvm_button_seconds", button="hide")
     async def hide(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc:
-            await vc.set_permissions(i.guild.default_role, view_channel=False)
-            await i.response.send_message("👻 Channel hidden.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'permissions', vc.set_permissions, i.guild.default_role, view_channel=False):
+                await i.followup.send("👻 Channel hidden.", ephemeral=True)
 
     @discord.ui.button(emoji="👁️", style=discord.ButtonStyle.secondary, custom_id="zvm:reveal", row=0)
+    @timed("zvm_button_seconds", button="reveal")
     async def reveal(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc:
-            await vc.set_permissions(i.guild.default_role, view_channel=None)
-            await i.response.send_message("👁️ Channel revealed.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'permissions', vc.set_permissions, i.guild.default_role, view_channel=None):
+                await i.followup.send("👁️ Channel revealed.", ephemeral=True)
 
     @discord.ui.button(emoji="👑", style=discord.ButtonStyle.primary, custom_id="zvm:claim", row=0)
+    @timed("zvm_button_seconds", button="claim")
     async def claim(self, i: discord.Interaction, b: Button):
         vc, tc = await self.get_user_channels(i)
         owner_id = self.cog.get_owner_of_channel(i.channel_id)
         owner = i.guild.get_member(owner_id)
+        if i.user.id in self.cog.user_channels:
+            return await i.response.send_message("You already own a channel. Delete it before claiming another.", ephemeral=True)
+
+        try:
+            self.cog.user_channels.transfer(owner_id, i.user.id)
+        except (KeyError, ValueError):
+            return await i.response.send_message("This channel changed hands in the meantime. Please try again.", ephemeral=True)
         
-        self.cog.user_channels[i.user.id] = self.cog.user_channels.pop(owner_id)
-        
-        await vc.set_permissions(i.user, manage_channels=True, manage_roles=True)
-        await tc.set_permissions(i.user, read_messages=True)
+        await i.response.defer(ephemeral=True)
+        if not await self.submit(i, 'permissions', vc.set_permissions, i.user, manage_channels=True, manage_roles=True): return
+        if tc: self.cog.overwrite_batcher.grant(tc, i.user)
         if owner:
-            await vc.set_permissions(owner, overwrite=None)
-            await tc.set_permissions(owner, overwrite=None)
+            if not await self.submit(i, 'permissions', vc.set_permissions, owner, overwrite=None): return
+            if tc: self.cog.overwrite_batcher.revoke(tc, owner)
             
-        await i.response.send_message(f"👑 {i.user.mention} has claimed the channel!")
+        await i.followup.send(f"👑 {i.user.mention} has claimed the channel!")
 
     @discord.ui.button(emoji="✏️", style=discord.ButtonStyle.primary, custom_id="zvm:rename", row=1)
+    @timed("zvm_button_seconds", button="rename")
     async def rename(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if not vc: return
@@ -122,15 +277,17 @@ class ControlPanelView(View):
         async def modal_callback(interaction, new_name):
             vc_rename, tc_rename = await self.get_user_channels(interaction)
             if vc_rename:
-                await vc_rename.edit(name=new_name)
+                await interaction.response.defer(ephemeral=True)
+                if not await self.submit(interaction, 'edit', vc_rename.edit, name=new_name): return
                 panel_name = f"＃{new_name.lower().replace(' ', '-')}-panel"
-                await tc_rename.edit(name=panel_name)
-                await interaction.response.send_message(f"Channel renamed to '{new_name}'.", ephemeral=True)
+                if tc_rename and not await self.submit(interaction, 'edit', tc_rename.edit, name=panel_name): return
+                await interaction.followup.send(f"Channel renamed to '{new_name}'.", ephemeral=True)
         
         modal = ConfigModal("Rename Channel", "New Channel Name", vc.name, vc.name, modal_callback)
         await i.response.send_modal(modal)
 
     @discord.ui.button(emoji="🚫", style=discord.ButtonStyle.danger, custom_id="zvm:kick", row=1)
+    @timed("zvm_button_seconds", button="kick")
     async def kick(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         members_to_kick = [m for m in vc.members if m.id != i.user.id]
@@ -142,8 +299,9 @@ class ControlPanelView(View):
             member_id = int(interaction.data['values'][0])
             member = i.guild.get_member(member_id)
             if member and member.voice and member.voice.channel == vc:
-                await member.move_to(None, reason="Kicked by channel owner.")
-                await interaction.response.send_message(f"Kicked {member.display_name}.", ephemeral=True)
+                await interaction.response.defer(ephemeral=True)
+                if await self.submit(interaction, 'move', member.move_to, None, reason="Kicked by channel owner."):
+                    await interaction.followup.send(f"Kicked {member.display_name}.", ephemeral=True)
             else:
                 await interaction.response.send_message("Member has already left.", ephemeral=True)
             view.stop()
@@ -154,6 +312,7 @@ class ControlPanelView(View):
         await i.response.send_message("Who would you like to kick?", view=view, ephemeral=True)
 
     @discord.ui.button(emoji="🎉", style=discord.ButtonStyle.primary, custom_id="zvm:activity", row=1)
+    @timed("zvm_button_seconds", button="activity")
     async def activity(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if not vc: return
@@ -178,6 +337,7 @@ class ControlPanelView(View):
         await i.response.send_message("What activity would you like to start?", view=view, ephemeral=True)
 
     @discord.ui.button(emoji="➕", style=discord.ButtonStyle.secondary, custom_id="zvm:inc_limit", row=1)
+    @timed("zvm_button_seconds", button="inc_limit")
     async def increase_limit(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc:
@@ -185,31 +345,43 @@ class ControlPanelView(View):
             new_limit = min(current_limit + 1, 99)
             if new_limit == current_limit:
                 return await i.response.send_message("User limit is already at maximum (99).", ephemeral=True)
-            await vc.edit(user_limit=new_limit)
-            await i.response.send_message(f"User limit increased to {new_limit}.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'edit', vc.edit, user_limit=new_limit):
+                await i.followup.send(f"User limit increased to {new_limit}.", ephemeral=True)
 
     @discord.ui.button(emoji="➖", style=discord.ButtonStyle.secondary, custom_id="zvm:dec_limit", row=1)
+    @timed("zvm_button_seconds", button="dec_limit")
     async def decrease_limit(self, i: discord.Interaction, b: Button):
         vc, _ = await self.get_user_channels(i)
         if vc and vc.user_limit > 0:
             new_limit = max(vc.user_limit - 1, 1)
             if new_limit == vc.user_limit:
                  return await i.response.send_message("User limit is already at minimum (1).", ephemeral=True)
-            await vc.edit(user_limit=new_limit)
-            await i.response.send_message(f"User limit decreased to {new_limit}.", ephemeral=True)
+            await i.response.defer(ephemeral=True)
+            if await self.submit(i, 'edit', vc.edit, user_limit=new_limit):
+                await i.followup.send(f"User limit decreased to {new_limit}.", ephemeral=True)
 
 class SetupView(View):
     def __init__(self, cog_instance, author):
         super().__init__(timeout=300)
         self.cog = cog_instance
         self.author = author
-        self.settings = self.cog.guild_settings.get(author.guild.id, {}).copy()
-        if not self.settings:
-            self.settings = {
-                "category_id": None, "creator_channel_name": "➕ Join to Create",
-                "default_limit": 0, "default_hidden": False
-            }
-        self.update_category_select()
+        current = self.cog.guild_settings.get(author.guild.id)
+        if current:
+            self.settings = dict(current, creators=[dict(c) for c in current.get('creators', [])])
+        else:
+            self.settings = {"empty_grace_seconds": 1, "idle_timeout_seconds": DEFAULT_IDLE_TIMEOUT, "idle_deafened": False, "pool_size": 0, "single_channel": False, "creators": []}
+        if not self.settings['creators']:
+            self.settings['creators'].append(dict(DEFAULT_CREATOR))
+        self.index = 0
+        if self.creator.get('category_id'):
+            self.update_buttons()
+        else:
+            self.update_category_select()
+
+    @property
+    def creator(self):
+        return self.settings['creators'][self.index]
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.author.id:
@@ -221,53 +393,133 @@ class SetupView(View):
         self.clear_items()
         options = [discord.SelectOption(label=c.name, value=str(c.id)) for c in self.author.guild.categories]
         if not options: return
-        category_select = Select(placeholder="1. Select a Category...", options=options)
+        category_select = Select(placeholder="1. Select a Category for this hub...", options=options[:25])
         category_select.callback = self.on_category_select
         self.add_item(category_select)
-        
+
     def build_embed(self):
         embed = discord.Embed(title="Z-VoiceMaster Setup", color=0x7289DA)
         embed.description = "Configure the settings for your temporary voice channels."
-        cat_id = self.settings.get('category_id')
+        hubs = []
+        for index, creator in enumerate(self.settings['creators']):
+            marker = "▶" if index == self.index else "•"
+            hubs.append(f"{marker} `{creator.get('creator_channel_name')}`")
+        embed.add_field(name="Creator Hubs", value="\n".join(hubs), inline=False)
+        cat_id = self.creator.get('category_id')
         cat_obj = self.author.guild.get_channel(cat_id) if cat_id else None
         cat_name = f"✅ {cat_obj.name}" if cat_obj else "❌ Not Set"
         embed.add_field(name="Category", value=cat_name, inline=False)
-        embed.add_field(name="Creator Channel Name", value=f"`{self.settings.get('creator_channel_name')}`", inline=False)
-        limit = self.settings.get('default_limit', 0)
+        embed.add_field(name="Creator Channel Name", value=f"`{self.creator.get('creator_channel_name')}`", inline=True)
+        embed.add_field(name="Channel Name Template", value=f"`{self.creator.get('name_template', DEFAULT_CREATOR['name_template'])}`", inline=True)
+        limit = self.creator.get('default_limit', 0)
         embed.add_field(name="Default User Limit", value=f"`{limit if limit > 0 else 'Unlimited'}`", inline=True)
-        hidden = "Yes" if self.settings.get('default_hidden') else "No"
+        hidden = "Yes" if self.creator.get('default_hidden') else "No"
         embed.add_field(name="Hidden by Default?", value=f"`{hidden}`", inline=True)
+        embed.add_field(name="Empty Channel Grace", value=f"`{self.settings.get('empty_grace_seconds', 1)}s`", inline=True)
+        idle_timeout = self.settings.get('idle_timeout_seconds', DEFAULT_IDLE_TIMEOUT)
+        embed.add_field(name="Idle Channel Reclaim", value=f"`{f'{idle_timeout}s' if idle_timeout > 0 else 'Disabled'}`", inline=True)
+        embed.add_field(name="Deafened Members", value=f"`{'Idle' if self.settings.get('idle_deafened') else 'Active'}`", inline=True)
+        pool_size = self.settings.get('pool_size', 0)
+        embed.add_field(name="Pre-warmed Channels", value=f"`{pool_size if pool_size > 0 else 'Disabled'}`", inline=True)
+        panel_location = "Voice Channel Chat" if self.settings.get('single_channel') else "Separate Text Channel"
+        embed.add_field(name="Control Panel Location", value=f"`{panel_location}`", inline=True)
         embed.set_footer(text=base64.b64decode('TWFkZSDigJliIFRoZUhvbHlPbmVa').decode('utf-8'))
         return embed
 
     def update_buttons(self):
         self.clear_items()
-        name_button = Button(label="Set Creator Name", style=discord.ButtonStyle.secondary, emoji="✏️")
+        if len(self.settings['creators']) > 1:
+            options = [
+                discord.SelectOption(label=c.get('creator_channel_name') or f"Hub {index + 1}", value=str(index), default=index == self.index)
+                for index, c in enumerate(self.settings['creators'])
+            ]
+            hub_select = Select(placeholder="Select a hub to edit...", options=options, row=0)
+            hub_select.callback = self.on_hub_select
+            self.add_item(hub_select)
+        name_button = Button(label="Set Creator Name", style=discord.ButtonStyle.secondary, emoji="✏️", row=1)
         name_button.callback = self.on_set_name
         self.add_item(name_button)
-        limit_button = Button(label="Set User Limit", style=discord.ButtonStyle.secondary, emoji="🔧")
+        template_button = Button(label="Set Name Template", style=discord.ButtonStyle.secondary, emoji="🏷️", row=1)
+        template_button.callback = self.on_set_template
+        self.add_item(template_button)
+        limit_button = Button(label="Set User Limit", style=discord.ButtonStyle.secondary, emoji="🔧", row=1)
         limit_button.callback = self.on_set_limit
         self.add_item(limit_button)
-        visibility_button = Button(label=f"Visibility: {'Hidden' if self.settings.get('default_hidden') else 'Visible'}", style=discord.ButtonStyle.secondary, emoji="👁️")
+        visibility_button = Button(label=f"Visibility: {'Hidden' if self.creator.get('default_hidden') else 'Visible'}", style=discord.ButtonStyle.secondary, emoji="👁️", row=1)
         visibility_button.callback = self.on_toggle_visibility
         self.add_item(visibility_button)
-        save_button = Button(label="Save & Finish", style=discord.ButtonStyle.success, emoji="✅", row=1)
+        category_button = Button(label="Change Category", style=discord.ButtonStyle.secondary, emoji="📁", row=1)
+        category_button.callback = self.on_change_category
+        self.add_item(category_button)
+        grace_button = Button(label="Set Grace Period", style=discord.ButtonStyle.secondary, emoji="⏳", row=2)
+        grace_button.callback = self.on_set_grace
+        self.add_item(grace_button)
+        idle_button = Button(label="Set Idle Timeout", style=discord.ButtonStyle.secondary, emoji="💤", row=2)
+        idle_button.callback = self.on_set_idle_timeout
+        self.add_item(idle_button)
+        deafened_button = Button(label=f"Deafened: {'Idle' if self.settings.get('idle_deafened') else 'Active'}", style=discord.ButtonStyle.secondary, emoji="🔇", row=2)
+        deafened_button.callback = self.on_toggle_idle_deafened
+        self.add_item(deafened_button)
+        pool_button = Button(label="Set Pool Size", style=discord.ButtonStyle.secondary, emoji="📦", row=2)
+        pool_button.callback = self.on_set_pool_size
+        self.add_item(pool_button)
+        mode_button = Button(label=f"Panel: {'In Voice Chat' if self.settings.get('single_channel') else 'Text Channel'}", style=discord.ButtonStyle.secondary, emoji="💬", row=2)
+        mode_button.callback = self.on_toggle_single_channel
+        self.add_item(mode_button)
+        add_button = Button(label="Add Hub", style=discord.ButtonStyle.primary, emoji="➕", row=3, disabled=len(self.settings['creators']) >= MAX_CREATORS)
+        add_button.callback = self.on_add_hub
+        self.add_item(add_button)
+        remove_button = Button(label="Remove Hub", style=discord.ButtonStyle.secondary, emoji="🗑️", row=3, disabled=len(self.settings['creators']) <= 1)
+        remove_button.callback = self.on_remove_hub
+        self.add_item(remove_button)
+        save_button = Button(label="Save & Finish", style=discord.ButtonStyle.success, emoji="✅", row=3)
         save_button.callback = self.on_save
         self.add_item(save_button)
-        cancel_button = Button(label="Cancel", style=discord.ButtonStyle.danger, emoji="❌", row=1)
+        cancel_button = Button(label="Cancel", style=discord.ButtonStyle.danger, emoji="❌", row=3)
         cancel_button.callback = self.on_cancel
         self.add_item(cancel_button)
 
+    async def on_hub_select(self, interaction: discord.Interaction):
+        self.index = int(interaction.data['values'][0])
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_add_hub(self, interaction: discord.Interaction):
+        self.settings['creators'].append(dict(DEFAULT_CREATOR))
+        self.index = len(self.settings['creators']) - 1
+        self.update_category_select()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_remove_hub(self, interaction: discord.Interaction):
+        self.settings['creators'].pop(self.index)
+        self.index = 0
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_change_category(self, interaction: discord.Interaction):
+        self.update_category_select()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
     async def on_category_select(self, interaction: discord.Interaction):
-        self.settings['category_id'] = int(interaction.data['values'][0])
+        self.creator['category_id'] = int(interaction.data['values'][0])
         self.update_buttons()
         await interaction.response.edit_message(embed=self.build_embed(), view=self)
 
     async def on_set_name(self, interaction: discord.Interaction):
         async def modal_callback(inter, value):
-            self.settings['creator_channel_name'] = value
+            self.creator['creator_channel_name'] = value
+            self.update_buttons()
             await inter.response.edit_message(embed=self.build_embed(), view=self)
-        modal = ConfigModal("Set Creator Channel Name", "Name", "➕ Join to Create", self.settings.get('creator_channel_name'), modal_callback)
+        modal = ConfigModal("Set Creator Channel Name", "Name", "➕ Join to Create", self.creator.get('creator_channel_name'), modal_callback)
+        await interaction.response.send_modal(modal)
+
+    async def on_set_template(self, interaction: discord.Interaction):
+        async def modal_callback(inter, value):
+            if len(value) > 100:
+                return await inter.response.send_message("Invalid input. The template must be at most 100 characters.", ephemeral=True)
+            self.creator['name_template'] = value
+            await inter.response.edit_message(embed=self.build_embed(), view=self)
+        modal = ConfigModal("Set Channel Name Template", "Template ({user} = member name)", DEFAULT_CREATOR['name_template'], self.creator.get('name_template', DEFAULT_CREATOR['name_template']), modal_callback)
         await interaction.response.send_modal(modal)
 
     async def on_set_limit(self, interaction: discord.Interaction):
@@ -275,166 +527,1523 @@ class SetupView(View):
             try:
                 limit = int(value)
                 if not 0 <= limit <= 99: raise ValueError
-                self.settings['default_limit'] = limit
+                self.creator['default_limit'] = limit
                 await inter.response.edit_message(embed=self.build_embed(), view=self)
             except ValueError:
                 await inter.response.send_message("Invalid input. Please enter a number between 0 and 99.", ephemeral=True)
-        modal = ConfigModal("Set Default User Limit", "Limit (0 for unlimited)", 0, self.settings.get('default_limit'), modal_callback)
+        modal = ConfigModal("Set Default User Limit", "Limit (0 for unlimited)", 0, self.creator.get('default_limit'), modal_callback)
         await interaction.response.send_modal(modal)
         
+    async def on_set_grace(self, interaction: discord.Interaction):
+        async def modal_callback(inter, value):
+            try:
+                grace = int(value)
+                if not MIN_EMPTY_GRACE <= grace <= 300: raise ValueError
+                self.settings['empty_grace_seconds'] = grace
+                await inter.response.edit_message(embed=self.build_embed(), view=self)
+            except ValueError:
+                await inter.response.send_message(f"Invalid input. Please enter a number of seconds between {MIN_EMPTY_GRACE} and 300.", ephemeral=True)
+        modal = ConfigModal("Set Empty Channel Grace Period", "Seconds before an empty channel is deleted", 1, self.settings.get('empty_grace_seconds', 1), modal_callback)
+        await interaction.response.send_modal(modal)
+
+    async def on_set_idle_timeout(self, interaction: discord.Interaction):
+        async def modal_callback(inter, value):
+            try:
+                idle_timeout = int(value)
+                if not 0 <= idle_timeout <= 86400: raise ValueError
+                self.settings['idle_timeout_seconds'] = idle_timeout
+                await inter.response.edit_message(embed=self.build_embed(), view=self)
+            except ValueError:
+                await inter.response.send_message("Invalid input. Please enter a number of seconds between 0 and 86400.", ephemeral=True)
+        modal = ConfigModal("Set Idle Channel Timeout", "Seconds without active members (0 disables)", DEFAULT_IDLE_TIMEOUT, self.settings.get('idle_timeout_seconds', DEFAULT_IDLE_TIMEOUT), modal_callback)
+        await interaction.response.send_modal(modal)
+
+    async def on_set_pool_size(self, interaction: discord.Interaction):
+        async def modal_callback(inter, value):
+            try:
+                pool_size = int(value)
+                if not 0 <= pool_size <= 10: raise ValueError
+                self.settings['pool_size'] = pool_size
+                await inter.response.edit_message(embed=self.build_embed(), view=self)
+            except ValueError:
+                await inter.response.send_message("Invalid input. Please enter a number between 0 and 10.", ephemeral=True)
+        modal = ConfigModal("Set Channel Pool Size", "Pre-warmed channels (0 to disable)", 0, self.settings.get('pool_size', 0), modal_callback)
+        await interaction.response.send_modal(modal)
+
+    async def on_toggle_idle_deafened(self, interaction: discord.Interaction):
+        self.settings['idle_deafened'] = not self.settings.get('idle_deafened', False)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_toggle_single_channel(self, interaction: discord.Interaction):
+        self.settings['single_channel'] = not self.settings.get('single_channel', False)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
     async def on_toggle_visibility(self, interaction: discord.Interaction):
-        self.settings['default_hidden'] = not self.settings.get('default_hidden', False)
+        self.creator['default_hidden'] = not self.creator.get('default_hidden', False)
         self.update_buttons()
         await interaction.response.edit_message(embed=self.build_embed(), view=self)
 
     async def on_save(self, interaction: discord.Interaction):
-        guild_id = interaction.guild_id
-        current_settings = self.cog.guild_settings.get(guild_id, {})
-        old_creator_id = current_settings.get('creator_channel_id')
-        if old_creator_id:
+        guild = interaction.guild
+        if any(not creator.get('category_id') for creator in self.settings['creators']):
+            return await interaction.response.send_message("Every hub needs a category before saving.", ephemeral=True)
+        await interaction.response.defer()
+        current_settings = self.cog.guild_settings.get(guild.id, {})
+        old_creator_ids = {c['creator_channel_id'] for c in current_settings.get('creators', []) if c.get('creator_channel_id')}
+        for creator in self.settings['creators']:
+            old_channel = guild.get_channel(creator['creator_channel_id']) if creator.get('creator_channel_id') else None
+            if old_channel and old_channel.category_id == creator['category_id'] and old_channel.name == creator['creator_channel_name']:
+                continue
             try:
-                old_channel = interaction.guild.get_channel(old_creator_id)
+                if old_channel:
+                    try: await old_channel.delete()
+                    except (discord.NotFound, discord.Forbidden): pass
+                category = guild.get_channel(creator['category_id'])
+                creator_channel = await category.create_voice_channel(name=creator['creator_channel_name'])
+            except discord.HTTPException as e:
+                content = f"❌ Could not create the `{creator['creator_channel_name']}` hub: {e.text or e}. Settings were not saved, please try again."
+                return await interaction.edit_original_response(content=content, embed=self.build_embed(), view=self)
+            creator['creator_channel_id'] = creator_channel.id
+        kept_ids = {c['creator_channel_id'] for c in self.settings['creators']}
+        for channel_id in old_creator_ids - kept_ids:
+            try:
+                old_channel = guild.get_channel(channel_id)
                 if old_channel: await old_channel.delete()
             except (discord.NotFound, discord.Forbidden): pass
-        category = interaction.guild.get_channel(self.settings['category_id'])
-        creator_channel = await category.create_voice_channel(name=self.settings['creator_channel_name'])
-        self.settings['creator_channel_id'] = creator_channel.id
-        self.cog.guild_settings[guild_id] = self.settings
-        self.cog.save_settings()
-        await interaction.response.edit_message(content="✅ **Setup Complete!** Your settings have been saved.", embed=None, view=None)
+        self.cog.set_guild_settings(guild.id, self.settings)
+        self.cog.save_settings(guild.id)
+        await interaction.edit_original_response(content="✅ **Setup Complete!** Your settings have been saved.", embed=None, view=None)
         self.stop()
+        await self.cog.channel_pool.drain(guild)
+        self.cog.channel_pool.refill(guild, self.settings)
 
     async def on_cancel(self, interaction: discord.Interaction):
         await interaction.response.edit_message(content="Setup cancelled.", embed=None, view=None)
         self.stop()
 
+class RestQueueFull(Exception):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+class RestScheduler:
+    ROUTE_PRIORITIES = {'move': 0, 'create': 0, 'permissions': 1, 'edit': 2, 'delete': 2, 'prewarm': 2}
+
+    def __init__(self, workers=8, queue_size=500, guild_rate=25.0, guild_burst=50, route_rate=10.0, route_burst=20):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.guild_limits = (guild_rate, guild_burst)
+        self.route_limits = (route_rate, route_burst)
+        self.queues = [{} for _ in range(max(self.ROUTE_PRIORITIES.values()) + 1)]
+        self.sizes = [0] * len(self.queues)
+        self.guild_buckets = {}
+        self.route_buckets = {}
+        self.stats = {route: {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'throttled': 0, 'wait': 0.0} for route in self.ROUTE_PRIORITIES}
+        self._items = asyncio.Semaphore(0)
+        self._tasks = []
+
+    @property
+    def running(self):
+        return any(not task.done() for task in self._tasks)
+
+    def depth(self):
+        return list(self.sizes)
+
+    def start(self):
+        if self.running: return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self):
+        for task in self._tasks: task.cancel()
+        self._tasks = []
+        for queues in self.queues:
+            for queue in queues.values():
+                for job in queue:
+                    if not job[5].done(): job[5].cancel()
+            queues.clear()
+        self.sizes = [0] * len(self.queues)
+
+    async def submit(self, guild_id, route, func, *args, **kwargs):
+        stats = self.stats[route]
+        stats['submitted'] += 1
+        if not self.running:
+            return await self._call(stats, func, args, kwargs)
+        priority = self.ROUTE_PRIORITIES[route]
+        if self.sizes[priority] >= self.queue_size:
+            stats['rejected'] += 1
+            raise RestQueueFull(f"REST queue for '{route}' is full.")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self.queues[priority].get((guild_id, route))
+        if queue is None: queue = self.queues[priority][(guild_id, route)] = deque()
+        queue.append((guild_id, route, func, args, kwargs, future, loop.time()))
+        self.sizes[priority] += 1
+        self._items.release()
+        return await future
+
+    async def _call(self, stats, func, args, kwargs):
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            stats['failed'] += 1
+            raise
+        stats['completed'] += 1
+        return result
+
+    def _buckets(self, guild_id, route):
+        guild_bucket = self.guild_buckets.get(guild_id)
+        if guild_bucket is None:
+            guild_bucket = self.guild_buckets[guild_id] = TokenBucket(*self.guild_limits)
+        route_bucket = self.route_buckets.get((guild_id, route))
+        if route_bucket is None:
+            route_bucket = self.route_buckets[(guild_id, route)] = TokenBucket(*self.route_limits)
+        return guild_bucket, route_bucket
+
+    def _next_job(self):
+        wait = None
+        for priority, queues in enumerate(self.queues):
+            for key, queue in list(queues.items()):
+                while queue and queue[0][5].done():
+                    queue.popleft()
+                    self.sizes[priority] -= 1
+                if not queue:
+                    del queues[key]
+                    continue
+                buckets = self._buckets(*key)
+                delay = max(bucket.delay() for bucket in buckets)
+                if delay > 0:
+                    self.stats[key[1]]['throttled'] += 1
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                for bucket in buckets: bucket.consume()
+                job = queue.popleft()
+                self.sizes[priority] -= 1
+                del queues[key]
+                if queue: queues[key] = queue
+                return job, None
+        return None, wait
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._items.acquire()
+            job, wait = self._next_job()
+            if job is None:
+                if wait is None: continue
+                self._items.release()
+                await asyncio.sleep(min(wait, 0.05))
+                continue
+            guild_id, route, func, args, kwargs, future, enqueued = job
+            stats = self.stats[route]
+            stats['wait'] += loop.time() - enqueued
+            try:
+                future.set_result(await self._call(stats, func, args, kwargs))
+            except asyncio.CancelledError:
+                if not future.done(): future.cancel()
+                raise
+            except Exception as e:
+                if not future.done(): future.set_exception(e)
+
+class DeletionScheduler:
+    def __init__(self, callback, concurrency=5, max_batch=50):
+        self.callback = callback
+        self.concurrency = concurrency
+        self.max_batch = max_batch
+        self.deadlines = {}
+        self.heap = []
+        self.processed = 0
+        self.cancelled = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task: self._task.cancel()
+
+    def schedule(self, channel_id, delay):
+        deadline = asyncio.get_running_loop().time() + delay
+        self.deadlines[channel_id] = deadline
+        heapq.heappush(self.heap, (deadline, channel_id))
+        if self.heap[0] == (deadline, channel_id): self._wakeup.set()
+
+    def cancel(self, channel_id):
+        if self.deadlines.pop(channel_id, None) is not None:
+            self.cancelled += 1
+            return True
+        return False
+
+    def _pop_due(self, now):
+        batch = []
+        while self.heap and self.heap[0][0] <= now and len(batch) < self.max_batch:
+            deadline, channel_id = heapq.heappop(self.heap)
+            if self.deadlines.get(channel_id) == deadline:
+                del self.deadlines[channel_id]
+                batch.append(channel_id)
+        return batch
+
+    async def _process(self, channel_id, semaphore):
+        async with semaphore:
+            try:
+                await self.callback(channel_id)
+            except Exception as e:
+                print(f"Error reaping channel {channel_id}: {e}")
+            self.processed += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            self._wakeup.clear()
+            batch = self._pop_due(loop.time())
+            if batch:
+                await asyncio.gather(*(self._process(channel_id, semaphore) for channel_id in batch))
+                continue
+            timeout = self.heap[0][0] - loop.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+class OverwriteBatcher:
+    MAX_RETRIES = 5
+
+    def __init__(self, window=0.5, rest=None):
+        self.window = window
+        self.rest = rest
+        self.pending = {}
+        self.applied_changes = {}
+        self.retries = {}
+        self.tasks = {}
+        self.requested = 0
+        self.applied = 0
+
+    @property
+    def calls_saved(self):
+        return self.requested - self.applied
+
+    def grant(self, channel, member):
+        self._queue(channel, member, True)
+
+    def revoke(self, channel, member):
+        self._queue(channel, member, False)
+
+    def _queue(self, channel, member, allow):
+        self.requested += 1
+        _, changes = self.pending.setdefault(channel.id, (channel, {}))
+        changes[member.id] = (member, allow)
+        self._schedule(channel)
+
+    def _schedule(self, channel):
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.get_running_loop().create_task(self._flush_later(channel.id))
+
+    async def _flush_later(self, channel_id):
+        try:
+            while channel_id in self.pending:
+                await asyncio.sleep(self.window)
+                await self.flush(channel_id)
+        finally:
+            self.tasks.pop(channel_id, None)
+
+    async def flush(self, channel_id):
+        channel, changes = self.pending.pop(channel_id, (None, None))
+        if not changes: return
+        wanted = {**self.applied_changes.get(channel_id, {}), **changes}
+        overwrites = {target.id: (target, overwrite) for target, overwrite in channel.overwrites.items()}
+        changed = False
+        for member_id, (member, allow) in wanted.items():
+            if allow and member_id not in overwrites:
+                overwrites[member_id] = (member, discord.PermissionOverwrite(read_messages=True))
+                changed = True
+            elif not allow and member_id in overwrites:
+                del overwrites[member_id]
+                changed = True
+        if not changed: return
+        overwrites = dict(overwrites.values())
+        try:
+            if self.rest:
+                await self.rest.submit(channel.guild.id, 'permissions', channel.edit, overwrites=overwrites)
+            else:
+                await channel.edit(overwrites=overwrites)
+            self.applied += 1
+            self.applied_changes[channel_id] = wanted
+            self.retries.pop(channel_id, None)
+        except (discord.NotFound, discord.Forbidden): self.retries.pop(channel_id, None)
+        except (discord.HTTPException, RestQueueFull) as e:
+            retries = self.retries[channel_id] = self.retries.get(channel_id, 0) + 1
+            transient = isinstance(e, RestQueueFull) or e.status == 429 or e.status >= 500
+            if not transient or retries > self.MAX_RETRIES:
+                print(f"Error applying overwrites for channel {channel_id}: {e}")
+                metrics.inc("zvm_errors_total", operation="overwrites")
+                self.retries.pop(channel_id, None)
+                return
+            _, newer = self.pending.setdefault(channel_id, (channel, {}))
+            for member_id, change in changes.items(): newer.setdefault(member_id, change)
+            self._schedule(channel)
+
+    def discard(self, channel_id):
+        task = self.tasks.pop(channel_id, None)
+        if task: task.cancel()
+        self.pending.pop(channel_id, None)
+        self.retries.pop(channel_id, None)
+        self.applied_changes.pop(channel_id, None)
+
+class VoiceEventCoalescer:
+    def __init__(self, callback, window=0.5, hop_threshold=10, hop_period=30.0, cooldown=10.0):
+        self.callback = callback
+        self.window = window
+        self.hop_threshold = hop_threshold
+        self.hop_period = hop_period
+        self.cooldown = cooldown
+        self.pending = {}
+        self.hops = {}
+        self.cooling = {}
+        self.tasks = {}
+        self.received = 0
+        self.dispatched = 0
+        self.cooldowns = 0
+        self.pruned_at = 0.0
+
+    @property
+    def suppressed(self):
+        return self.received - self.dispatched
+
+    def _record_hop(self, member_id, now):
+        hops = self.hops.setdefault(member_id, deque())
+        hops.append(now)
+        while hops[0] < now - self.hop_period: hops.popleft()
+        if self.cooling.get(member_id, 0) > now: return True
+        if len(hops) <= self.hop_threshold: return False
+        self.cooling[member_id] = now + self.cooldown
+        self.cooldowns += 1
+        return True
+
+    def _forget(self, member_id, now):
+        hops = self.hops.get(member_id)
+        if hops is not None:
+            while hops and hops[0] < now - self.hop_period: hops.popleft()
+            if not hops: del self.hops[member_id]
+        if self.cooling.get(member_id, now) <= now: self.cooling.pop(member_id, None)
+
+    def prune(self, now):
+        self.pruned_at = now
+        for member_id in [member_id for member_id, hops in self.hops.items() if hops[-1] < now - self.hop_period]: del self.hops[member_id]
+        for member_id in [member_id for member_id, until in self.cooling.items() if until <= now]: del self.cooling[member_id]
+
+    async def submit(self, member, before, after):
+        if before.channel == after.channel: return
+        self.received += 1
+        if not self.window:
+            self.dispatched += 1
+            return await self.callback(member, before, after)
+        now = asyncio.get_running_loop().time()
+        if now - self.pruned_at >= self.hop_period: self.prune(now)
+        cooling = self._record_hop(member.id, now)
+        entry = self.pending.get(member.id)
+        if entry:
+            entry[2] = after
+            if after.channel: entry[3][after.channel.id] = after.channel
+            return
+        if cooling:
+            self._open(member, before, after, self.cooling[member.id] - now)
+            if after.channel: self.pending[member.id][3][after.channel.id] = after.channel
+            return
+        self._open(member, after, after, self.window)
+        self.dispatched += 1
+        await self.callback(member, before, after)
+
+    def _open(self, member, dispatched, latest, delay):
+        self.pending[member.id] = [member, dispatched, latest, {}]
+        self.tasks[member.id] = asyncio.get_running_loop().create_task(self._flush_later(member.id, delay))
+
+    async def _flush_later(self, member_id, delay):
+        await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        self.tasks.pop(member_id, None)
+        member, dispatched, latest, visited = self.pending[member_id]
+        until = self.cooling.get(member_id, 0)
+        if until > loop.time():
+            self.tasks[member_id] = loop.create_task(self._flush_later(member_id, until - loop.time()))
+            return
+        del self.pending[member_id]
+        before_id = dispatched.channel.id if dispatched.channel else None
+        after_id = latest.channel.id if latest.channel else None
+        passed_through = [channel for channel_id, channel in visited.items() if channel_id not in (before_id, after_id)]
+        self._forget(member_id, loop.time())
+        if latest is dispatched: return
+        self._open(member, latest, latest, self.window)
+        self.dispatched += 1
+        try:
+            await self.callback(member, dispatched, latest, passed_through)
+        except Exception as e:
+            print(f"Error handling coalesced voice state for {member}: {e}")
+
+    def stop(self):
+        for task in self.tasks.values(): task.cancel()
+        self.tasks.clear()
+        self.pending.clear()
+        self.hops.clear()
+        self.cooling.clear()
+
+class SettingsStore:
+    def __init__(self, path, delay=1.0):
+        self.path = path
+        self.directory = os.path.splitext(path)[0]
+        self.delay = delay
+        self.data = {}
+        self.mtimes = {}
+        self._dirty = set()
+        self._writing = set()
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.data.update({int(k): v for k, v in json.load(f).items()})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        for filename in os.listdir(self.directory):
+            guild_id, ext = os.path.splitext(filename)
+            if ext != '.json' or not guild_id.isdigit(): continue
+            try:
+                path = os.path.join(self.directory, filename)
+                with open(path, 'r') as f:
+                    self.data[int(guild_id)] = json.load(f)
+                self.mtimes[int(guild_id)] = os.stat(path).st_mtime_ns
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        return self.data
+
+    def poll(self):
+        changed, seen = {}, set()
+        for entry in os.scandir(self.directory):
+            guild_id, ext = os.path.splitext(entry.name)
+            if ext != '.json' or not guild_id.isdigit(): continue
+            guild_id = int(guild_id)
+            seen.add(guild_id)
+            try: mtime = entry.stat().st_mtime_ns
+            except FileNotFoundError: continue
+            if self.mtimes.get(guild_id) == mtime or guild_id in self._dirty or guild_id in self._writing: continue
+            try:
+                with open(entry.path, 'r') as f:
+                    changed[guild_id] = json.load(f)
+                self.mtimes[guild_id] = mtime
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        for guild_id in set(self.mtimes) - seen:
+            del self.mtimes[guild_id]
+            if guild_id not in self._dirty and guild_id not in self._writing: changed[guild_id] = None
+        return changed
+
+    async def poll_async(self):
+        async with self._lock:
+            return await asyncio.get_running_loop().run_in_executor(None, self.poll)
+
+    def save(self, guild_id):
+        self._dirty.add(guild_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if not dirty: return
+            self._writing = dirty
+            try:
+                payloads = {gid: json.dumps(self.data[gid], indent=4) if gid in self.data else None for gid in dirty}
+                await asyncio.get_running_loop().run_in_executor(None, self._write, payloads)
+            except Exception as e:
+                self._dirty |= dirty
+                print(f"Error saving Z-VoiceMaster settings for {len(dirty)} guilds: {e}")
+                metrics.inc("zvm_errors_total", operation="save_settings")
+            finally:
+                self._writing = set()
+
+    def _write(self, payloads):
+        for guild_id, payload in payloads.items():
+            target = os.path.join(self.directory, f"{guild_id}.json")
+            if payload is None:
+                try: os.remove(target)
+                except FileNotFoundError: pass
+                self.mtimes.pop(guild_id, None)
+                continue
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+            self.mtimes[guild_id] = os.stat(target).st_mtime_ns
+
+class Session:
+    __slots__ = ('owner_id', 'guild_id', 'voice_channel_id', 'text_channel_id', 'control_message_id', 'created_at', 'last_activity')
+
+    def __init__(self, owner_id, guild_id, voice_channel_id, text_channel_id=None, control_message_id=None, created_at=None, last_activity=None):
+        self.owner_id = owner_id
+        self.guild_id = guild_id
+        self.voice_channel_id = voice_channel_id
+        self.text_channel_id = text_channel_id
+        self.control_message_id = control_message_id
+        self.created_at = time.time() if created_at is None else created_at
+        self.last_activity = self.created_at if last_activity is None else last_activity
+
+    def __repr__(self):
+        return f"Session(owner_id={self.owner_id}, guild_id={self.guild_id}, voice_channel_id={self.voice_channel_id})"
+
+    def __eq__(self, other):
+        return isinstance(other, Session) and self.to_row() == other.to_row()
+
+    def replace(self, **changes):
+        return Session(*(changes.get(field, getattr(self, field)) for field in self.__slots__))
+
+    def to_row(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+class SessionStore:
+    COLUMNS = Session.__slots__
+
+    def __init__(self, path, log_changes=False):
+        self.log_changes = log_changes
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=1.0, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (owner_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, "
+            "voice_channel_id INTEGER, text_channel_id INTEGER, control_message_id INTEGER, created_at REAL, last_activity REAL)"
+        )
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+        for column in ('created_at', 'last_activity'):
+            if column not in existing: self.conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} REAL")
+        for column in ('voice_channel_id', 'text_channel_id', 'control_message_id'):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS sessions_{column} ON sessions ({column})")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, owner_id INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS channels (channel_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sweep_leases (guild_id INTEGER PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)")
+
+    @locked
+    def load_all(self):
+        cursor = self.conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM sessions")
+        return {row[0]: Session.from_row(row) for row in cursor}
+
+    @locked
+    def load(self, owner_ids):
+        owner_ids = list(owner_ids)
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM sessions WHERE owner_id IN ({', '.join('?' * len(owner_ids))})", owner_ids
+        )
+        return {row[0]: Session.from_row(row) for row in cursor}
+
+    @locked
+    def lookup(self, key):
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM sessions WHERE owner_id = ? OR voice_channel_id = ? OR text_channel_id = ? OR control_message_id = ? LIMIT 1",
+            (key,) * 4
+        ).fetchone()
+        return Session.from_row(row) if row else None
+
+    @locked
+    def head(self):
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    @locked
+    def changes_since(self, seq):
+        rows = self.conn.execute("SELECT seq, owner_id FROM changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        if not rows: return seq, set()
+        if rows[0][0] != seq + 1: return rows[-1][0], None
+        return rows[-1][0], {owner_id for _, owner_id in rows}
+
+    @locked
+    def prune(self, keep=10000):
+        self.conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (keep,))
+
+    @locked
+    def _write(self, sql, params, owner_ids):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            changed = self.conn.execute(sql, params).rowcount > 0
+            if changed and self.log_changes:
+                self.conn.executemany("INSERT INTO changes (owner_id) VALUES (?)", [(owner_id,) for owner_id in owner_ids])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return changed
+
+    def put(self, session):
+        return self._write(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+            session.to_row(), (session.owner_id,)
+        )
+
+    def delete(self, owner_id, voice_channel_id):
+        return self._write("DELETE FROM sessions WHERE owner_id = ? AND voice_channel_id IS ?", (owner_id, voice_channel_id), (owner_id,))
+
+    def transfer(self, old_owner_id, new_owner_id, voice_channel_id):
+        return self._write(
+            "UPDATE sessions SET owner_id = ? WHERE owner_id = ? AND voice_channel_id IS ? "
+            "AND NOT EXISTS (SELECT 1 FROM sessions WHERE owner_id = ?)",
+            (new_owner_id, old_owner_id, voice_channel_id, new_owner_id), (old_owner_id, new_owner_id)
+        )
+
+    @locked
+    def _write_many(self, sql, rows):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(sql, rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def touch(self, activity):
+        self._write_many(
+            "UPDATE sessions SET last_activity = ? WHERE owner_id = ? AND (last_activity IS NULL OR last_activity < ?)",
+            [(at, owner_id, at) for owner_id, at in activity.items()]
+        )
+
+    def record_channels(self, guild_id, channel_ids):
+        self._write_many("INSERT OR IGNORE INTO channels (channel_id, guild_id) VALUES (?, ?)", [(channel_id, guild_id) for channel_id in channel_ids])
+
+    def forget_channels(self, channel_ids):
+        self._write_many("DELETE FROM channels WHERE channel_id = ?", [(channel_id,) for channel_id in channel_ids])
+
+    @locked
+    def created_channels(self, guild_id):
+        return {row[0] for row in self.conn.execute("SELECT channel_id FROM channels WHERE guild_id = ?", (guild_id,))}
+
+    @locked
+    def activity(self, owner_ids):
+        owner_ids = list(owner_ids)
+        cursor = self.conn.execute(
+            f"SELECT owner_id, last_activity FROM sessions WHERE owner_id IN ({', '.join('?' * len(owner_ids))})", owner_ids
+        )
+        return dict(cursor.fetchall())
+
+    def claim_sweep(self, guild_id, holder, ttl, now=None):
+        now = time.time() if now is None else now
+        return self._write(
+            "INSERT INTO sweep_leases (guild_id, holder, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET holder = excluded.holder, expires = excluded.expires "
+            "WHERE sweep_leases.holder = excluded.holder OR sweep_leases.expires < ?",
+            (guild_id, holder, now + ttl, now), ()
+        )
+
+    @locked
+    def close(self):
+        self.conn.close()
+
+class SessionRegistry:
+    def __init__(self, store=None, shared=False):
+        self.store = store
+        self.shared = shared and store is not None
+        self.seq = 0
+        self.touched = {}
+        self.missing = set()
+        self.recent = None
+        self.by_owner = {}
+        self.by_channel = {}
+        self.by_message = {}
+        self.by_guild = {}
+
+    def __len__(self):
+        return len(self.by_owner)
+
+    def __contains__(self, owner_id):
+        if owner_id not in self.by_owner: self._read_through(owner_id)
+        return owner_id in self.by_owner
+
+    def __iter__(self):
+        return iter(self.by_owner)
+
+    def get(self, owner_id, default=None):
+        if owner_id not in self.by_owner: self._read_through(owner_id)
+        return self.by_owner.get(owner_id, default)
+
+    def owner_of_channel(self, channel_id):
+        if channel_id not in self.by_channel: self._read_through(channel_id)
+        return self.by_channel.get(channel_id)
+
+    def owner_of_message(self, message_id):
+        if message_id not in self.by_message: self._read_through(message_id)
+        return self.by_message.get(message_id)
+
+    def guild_sessions(self, guild_id):
+        return self.by_guild.get(guild_id, set())
+
+    def restore(self):
+        if not self.store: return 0
+        self.seq = self.store.head()
+        for owner_id, session in self.store.load_all().items():
+            self._replace(owner_id, session)
+        return len(self.by_owner)
+
+    def _read_through(self, key):
+        if not self.shared or key in self.missing: return
+        session = self.store.lookup(key)
+        if session:
+            self._replace(session.owner_id, session)
+            return
+        if len(self.missing) >= MISSING_CACHE_SIZE: self.missing.clear()
+        self.missing.add(key)
+
+    def fetch(self, seq):
+        seq, owner_ids = self.store.changes_since(seq)
+        if owner_ids is None: return seq, None, self.store.load_all()
+        return seq, owner_ids, self.store.load(owner_ids) if owner_ids else {}
+
+    def apply(self, fetched, skip=()):
+        seq, owner_ids, fresh = fetched
+        self.seq = max(self.seq, seq)
+        if owner_ids is None: owner_ids = set(self.by_owner) | set(fresh)
+        owner_ids = [owner_id for owner_id in owner_ids if owner_id not in skip]
+        for owner_id in owner_ids: self._replace(owner_id, fresh.get(owner_id))
+        return len(owner_ids)
+
+    def sync(self):
+        if not self.store: return 0
+        return self.apply(self.fetch(self.seq))
+
+    async def refresh(self):
+        if not self.store: return 0
+        self.recent = recent = set()
+        try:
+            fetched = await asyncio.get_running_loop().run_in_executor(None, self.fetch, self.seq)
+        finally:
+            self.recent = None
+        return self.apply(fetched, recent)
+
+    def _replace(self, owner_id, session):
+        if self.recent is not None: self.recent.add(owner_id)
+        old = self.by_owner.pop(owner_id, None)
+        if old: self._unindex(old)
+        if session:
+            if owner_id in self.touched: session.last_activity = max(session.last_activity or 0, self.touched[owner_id])
+            self.by_owner[owner_id] = session
+            self._index(session)
+            if self.missing: self.missing.difference_update((owner_id, session.voice_channel_id, session.text_channel_id, session.control_message_id))
+
+    def _index(self, session):
+        owner_id = session.owner_id
+        if session.voice_channel_id: self.by_channel[session.voice_channel_id] = owner_id
+        if session.text_channel_id: self.by_channel[session.text_channel_id] = owner_id
+        if session.control_message_id: self.by_message[session.control_message_id] = owner_id
+        self.by_guild.setdefault(session.guild_id, set()).add(owner_id)
+
+    def _unindex(self, session):
+        owner_id = session.owner_id
+        for channel_id in (session.voice_channel_id, session.text_channel_id):
+            if channel_id and self.by_channel.get(channel_id) == owner_id: del self.by_channel[channel_id]
+        if session.control_message_id and self.by_message.get(session.control_message_id) == owner_id:
+            del self.by_message[session.control_message_id]
+        owners = self.by_guild.get(session.guild_id)
+        if owners is not None:
+            owners.discard(owner_id)
+            if not owners: del self.by_guild[session.guild_id]
+
+    def touch(self, owner_id, now=None):
+        session = self.by_owner.get(owner_id)
+        if session: session.last_activity = self.touched[owner_id] = time.time() if now is None else now
+
+    async def flush_activity(self):
+        touched, self.touched = self.touched, {}
+        if self.store and touched: await asyncio.get_running_loop().run_in_executor(None, self.store.touch, touched)
+
+    def add(self, session):
+        if self.store: self.store.put(session)
+        self._replace(session.owner_id, session)
+
+    def remove(self, owner_id):
+        session = self.by_owner.get(owner_id)
+        if session is None: return None
+        if self.store and not self.store.delete(owner_id, session.voice_channel_id) and self.shared:
+            self.sync()
+            return None
+        self._replace(owner_id, None)
+        self.touched.pop(owner_id, None)
+        return session
+
+    def transfer(self, old_owner_id, new_owner_id):
+        if new_owner_id in self:
+            raise ValueError(f"{new_owner_id} already owns a session.")
+        if old_owner_id not in self.by_owner: raise KeyError(old_owner_id)
+        session = self.by_owner[old_owner_id]
+        if self.store and not self.store.transfer(old_owner_id, new_owner_id, session.voice_channel_id) and self.shared:
+            self.sync()
+            raise ValueError(f"Session of {old_owner_id} was changed by another process.")
+        self._replace(old_owner_id, None)
+        if old_owner_id in self.touched: self.touched[new_owner_id] = self.touched.pop(old_owner_id)
+        session = session.replace(owner_id=new_owner_id)
+        self._replace(new_owner_id, session)
+        return session
+
+class ChannelPool:
+    def __init__(self, cog_instance):
+        self.cog = cog_instance
+        self.pairs = {}
+        self.channel_ids = set()
+        self.claimed_ids = set()
+        self._refills = {}
+
+    def size(self, guild_id):
+        return len(self.pairs.get(guild_id, ()))
+
+    def take(self, guild_id):
+        pairs = self.pairs.get(guild_id)
+        if not pairs: return None
+        pair = pairs.popleft()
+        ids = (pair['voice_channel_id'], pair['text_channel_id'])
+        self.channel_ids.difference_update(ids)
+        self.claimed_ids.update(ids)
+        return pair
+
+    def release(self, pair):
+        self.claimed_ids.difference_update((pair['voice_channel_id'], pair['text_channel_id']))
+
+    def refill(self, guild, settings):
+        if settings.get('pool_size', 0) <= self.size(guild.id): return
+        task = self._refills.get(guild.id)
+        if task is None or task.done():
+            self._refills[guild.id] = asyncio.get_running_loop().create_task(self._fill(guild, settings))
+
+    async def _fill(self, guild, settings):
+        if not settings.get('creators'): return
+        category = guild.get_channel(settings['creators'][0]['category_id'])
+        if not category: return
+        pairs = self.pairs.setdefault(guild.id, deque())
+        while len(pairs) < settings.get('pool_size', 0):
+            vc = tc = None
+            try:
+                vc = await self.cog.create_channel(
+                    guild, 'prewarm', guild.create_voice_channel, name="Reserved", category=category,
+                    overwrites={ guild.default_role: discord.PermissionOverwrite(view_channel=False, connect=False) }
+                )
+                if not settings.get('single_channel'):
+                    tc = await self.cog.create_channel(
+                        guild, 'prewarm', guild.create_text_channel, name="＃reserved-panel", category=category,
+                        overwrites={ guild.default_role: discord.PermissionOverwrite(read_messages=False) }
+                    )
+                msg = await self.cog.rest_scheduler.submit(guild.id, 'prewarm', (tc or vc).send, embed=self.cog.build_panel_embed(), view=ControlPanelView(self.cog))
+            except (discord.HTTPException, RestQueueFull, sqlite3.Error) as e:
+                print(f"Error filling channel pool for {guild.name}: {e}")
+                await self.cog._rollback_channels(guild, (vc, tc), "Channel pool fill failed.")
+                return
+            pairs.append({'voice_channel_id': vc.id, 'text_channel_id': tc.id if tc else None, 'control_message_id': msg.id})
+            self.channel_ids.update(c.id for c in (vc, tc) if c)
+
+    async def drain(self, guild=None):
+        guild_ids = [guild.id] if guild else list(self.pairs)
+        for guild_id in guild_ids:
+            task = self._refills.pop(guild_id, None)
+            if task: task.cancel()
+            for pair in self.pairs.pop(guild_id, ()):
+                for key in ('voice_channel_id', 'text_channel_id'):
+                    self.channel_ids.discard(pair[key])
+                    if self.cog.bot.get_channel(pair[key]): await self.cog._delete_channel(guild_id, pair[key], "Channel pool drained.")
+
 class ZVoiceMasterCog(commands.Cog, name="Z-VoiceMaster"):
     def __init__(self, bot):
         self.bot = bot
-        self.user_channels = {}
-        self.settings_file = "data/z-voicemaster.json"
-        os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
+        self.settings_file = SETTINGS_FILE
+        self.sessions_file = SESSIONS_FILE
+        os.makedirs(os.path.dirname(self.settings_file) or ".", exist_ok=True)
+        os.makedirs(os.path.dirname(self.sessions_file) or ".", exist_ok=True)
+        self.settings_store = SettingsStore(self.settings_file)
+        self.session_store = SessionStore(self.sessions_file, log_changes=SHARED_STATE)
+        self.user_channels = SessionRegistry(self.session_store, shared=SHARED_STATE)
+        self.user_channels.restore()
+        self.instance_id = uuid.uuid4().hex
+        self.rest_scheduler = RestScheduler()
+        self.overwrite_batcher = OverwriteBatcher(rest=self.rest_scheduler)
+        self.voice_coalescer = VoiceEventCoalescer(self.handle_voice_state, DEBOUNCE_WINDOW, HOP_THRESHOLD, HOP_PERIOD, HOP_COOLDOWN)
+        self.deletion_scheduler = DeletionScheduler(self.reap_channel)
+        self.channel_pool = ChannelPool(self)
+        self.pending_creations = {}
+        self.join_latency = {'pooled': deque(maxlen=1000), 'fresh': deque(maxlen=1000), 'panel': deque(maxlen=1000)}
+        self.teardown_latency = deque(maxlen=1000)
+        self.panel_tasks = set()
+        self.creator_index = {}
         self.guild_settings = self.load_settings()
+        for settings in self.guild_settings.values():
+            migrate_settings(settings)
+            self.index_creators(settings)
         self.bot.add_view(ControlPanelView(self))
+        self.metrics_runner = None
+        self.loop_lag_task = None
+        self.reconcile_task = None
+        self.sync_task = None
+        self.idle_sweep_task = None
+        self.last_reconcile = None
+        self.last_idle_sweep = None
+        metrics.collectors.clear()
+        metrics.register_collector(self.collect_metrics)
     
+    async def cog_load(self):
+        self.rest_scheduler.start()
+        self.deletion_scheduler.start()
+        self.reconcile_task = asyncio.get_running_loop().create_task(self.reconcile_loop())
+        if SHARED_STATE:
+            self.sync_task = asyncio.get_running_loop().create_task(self.sync_loop())
+        if IDLE_SWEEP_INTERVAL > 0:
+            self.idle_sweep_task = asyncio.get_running_loop().create_task(self.idle_sweep_loop())
+        if metrics.enabled:
+            self.loop_lag_task = asyncio.get_running_loop().create_task(self.monitor_loop_lag())
+        if METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", self.handle_metrics)
+            self.metrics_runner = web.AppRunner(app)
+            await self.metrics_runner.setup()
+            await web.TCPSite(self.metrics_runner, "127.0.0.1", METRICS_PORT).start()
+
+    async def cog_unload(self):
+        if self.reconcile_task: self.reconcile_task.cancel()
+        if self.sync_task: self.sync_task.cancel()
+        if self.idle_sweep_task: self.idle_sweep_task.cancel()
+        if self.panel_tasks: await asyncio.gather(*self.panel_tasks, return_exceptions=True)
+        if self.loop_lag_task: self.loop_lag_task.cancel()
+        if self.metrics_runner: await self.metrics_runner.cleanup()
+        self.voice_coalescer.stop()
+        self.deletion_scheduler.stop()
+        await self.channel_pool.drain()
+        self.rest_scheduler.stop()
+        await self.settings_store.flush()
+        await self.user_channels.flush_activity()
+        self.session_store.close()
+
     def load_settings(self):
-        try:
-            with open(self.settings_file, 'r') as f:
-                return {int(k): v for k, v in json.load(f).items()}
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+        return self.settings_store.load()
+
+    def save_settings(self, guild_id):
+        self.settings_store.save(guild_id)
+
+    def index_creators(self, settings):
+        for creator in settings.get('creators', ()):
+            if creator.get('creator_channel_id'): self.creator_index[creator['creator_channel_id']] = creator
 
-    def save_settings(self):
-        with open(self.settings_file, 'w') as f:
-            json.dump(self.guild_settings, f, indent=4)
+    def set_guild_settings(self, guild_id, settings):
+        for creator in self.guild_settings.get(guild_id, {}).get('creators', ()):
+            self.creator_index.pop(creator.get('creator_channel_id'), None)
+        if settings is None:
+            self.guild_settings.pop(guild_id, None)
+            return
+        self.guild_settings[guild_id] = settings
+        self.index_creators(settings)
+
+    def apply_settings_changes(self, changed):
+        for guild_id, settings in changed.items():
+            self.set_guild_settings(guild_id, migrate_settings(settings) if settings is not None else None)
+
+    def sync_shared_state(self):
+        changed = self.user_channels.sync()
+        self.apply_settings_changes(self.settings_store.poll())
+        self.session_store.prune()
+        return changed
+
+    async def refresh_shared_state(self):
+        changed = await self.user_channels.refresh()
+        self.apply_settings_changes(await self.settings_store.poll_async())
+        await asyncio.get_running_loop().run_in_executor(None, self.session_store.prune)
+        return changed
+
+    async def sync_loop(self):
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            try:
+                await self.refresh_shared_state()
+            except sqlite3.Error as e:
+                print(f"Error syncing shared state: {e}")
+                metrics.inc("zvm_errors_total", operation="sync_shared_state")
+
+    def collect_metrics(self):
+        yield "zvm_active_sessions", {}, len(self.user_channels)
+        yield "zvm_active_guilds", {}, len(self.user_channels.by_guild)
+        yield "zvm_configured_guilds", {}, len(self.guild_settings)
+        yield "zvm_pending_deletions", {}, len(self.deletion_scheduler.deadlines)
+        yield "zvm_pooled_channel_pairs", {}, len(self.channel_pool.channel_ids) // 2
+        yield "zvm_overwrite_calls_saved_total", {}, self.overwrite_batcher.calls_saved
+        yield "zvm_voice_events_received_total", {}, self.voice_coalescer.received
+        yield "zvm_voice_events_suppressed_total", {}, self.voice_coalescer.suppressed
+        yield "zvm_voice_hop_cooldowns_total", {}, self.voice_coalescer.cooldowns
+        for priority, depth in enumerate(self.rest_scheduler.depth()):
+            yield "zvm_rest_queue_depth", {'priority': priority}, depth
+        if self.last_reconcile:
+            for key, value in self.last_reconcile.items():
+                yield f"zvm_last_reconcile_{key}", {}, value
+        if self.last_idle_sweep:
+            for key, value in self.last_idle_sweep.items():
+                yield f"zvm_last_idle_sweep_{key}", {}, value
+        for route, stats in self.rest_scheduler.stats.items():
+            for key in ('submitted', 'completed', 'failed', 'rejected', 'throttled'):
+                yield f"zvm_rest_{key}_total", {'route': route}, stats[key]
+            yield "zvm_rest_queue_wait_seconds_total", {'route': route}, stats['wait']
+
+    async def monitor_loop_lag(self, interval=1.0):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            metrics.observe("zvm_event_loop_lag_seconds", max(0.0, loop.time() - started - interval))
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
 
     def get_owner_of_channel(self, channel_id: int):
-        for owner_id, info in self.user_channels.items():
-            if channel_id in (info.get('voice_channel_id'), info.get('text_channel_id')):
-                return owner_id
-        return None
+        return self.user_channels.owner_of_channel(channel_id)
+
+    def empty_grace(self, settings):
+        return max(settings.get('empty_grace_seconds', 1), MIN_EMPTY_GRACE)
+
+    def join_latency_report(self):
+        report = {}
+        for kind, samples in self.join_latency.items():
+            if not samples: continue
+            ordered = sorted(samples)
+            report[kind] = {
+                'p50': ordered[int(0.50 * (len(ordered) - 1))],
+                'p99': ordered[int(0.99 * (len(ordered) - 1))],
+                'count': len(ordered)
+            }
+        return report
+
+    def build_panel_embed(self, member: discord.Member = None):
+        embed = discord.Embed(title="Z-VoiceMaster Interface", color=0x2F3136)
+        if member:
+            embed.set_author(name=f"{member.display_name}'s Control Panel", icon_url=member.display_avatar)
+        else:
+            embed.set_author(name="Control Panel")
+        if self.bot.user.avatar:
+            embed.set_thumbnail(url=self.bot.user.avatar.url)
+        description = (
+            "**Button Usage**\n\n"
+            "🔒 — Lock the voice channel\n"
+            "🔓 — Unlock the voice channel\n"
+            "👻 — Hide the voice channel\n"
+            "👁️ — Reveal the voice channel\n"
+            "👑 — Claim the voice channel\n\n"
+            "✏️ — Rename the channel\n"
+            "🚫 — Disconnect a member\n"
+            "🎉 — Start an activity\n"
+            "➕ — Increase the user limit\n"
+            "➖ — Decrease the user limit\n"
+        )
+        embed.description = description
+        embed.set_footer(text=base64.b64decode('TWFkZSDigJxiIFRoZUhvbHlPbmVa').decode('utf-8'))
+        return embed
 
     @commands.Cog.listener()
     async def on_ready(self):
+        for guild_id, settings in self.guild_settings.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild: self.channel_pool.refill(guild, settings)
         print("Z-VoiceMaster Cog is online and ready.")
 
     @commands.Cog.listener()
+    @timed("zvm_handler_seconds", handler="on_voice_state_update")
     async def on_voice_state_update(self, member, before, after):
         if member.bot: return
+        if member.guild.id not in self.guild_settings: return
+        await self.voice_coalescer.submit(member, before, after)
+
+    async def handle_voice_state(self, member, before, after, passed_through=()):
         guild = member.guild
         settings = self.guild_settings.get(guild.id)
-        if not settings or 'creator_channel_id' not in settings: return
-        creator_channel_id = settings['creator_channel_id']
-        
+        if not settings: return
+
+        for channel in passed_through:
+            if not channel.members and self.get_owner_of_channel(channel.id):
+                self.deletion_scheduler.schedule(channel.id, self.empty_grace(settings))
+
         if after.channel:
             owner_id = self.get_owner_of_channel(after.channel.id)
+            if owner_id:
+                self.deletion_scheduler.cancel(after.channel.id)
+                self.user_channels.touch(owner_id)
             if owner_id and member.id != owner_id:
-                info = self.user_channels.get(owner_id)
-                if info:
-                    tc = guild.get_channel(info['text_channel_id'])
-                    if tc: await tc.set_permissions(member, read_messages=True)
-            elif after.channel.id == creator_channel_id:
-                await self.create_user_channel(member, settings)
-
-        if before.channel:
+                session = self.user_channels.get(owner_id)
+                if session and session.text_channel_id:
+                    tc = guild.get_channel(session.text_channel_id)
+                    if tc: self.overwrite_batcher.grant(tc, member)
+            elif after.channel.id in self.creator_index:
+                await self.create_user_channel(member, dict(settings, **self.creator_index[after.channel.id]))
+
+        if before.channel and before.channel != after.channel:
             owner_id = self.get_owner_of_channel(before.channel.id)
             if owner_id:
-                info = self.user_channels.get(owner_id)
-                if info:
-                    tc = guild.get_channel(info['text_channel_id'])
+                self.user_channels.touch(owner_id)
+                session = self.user_channels.get(owner_id)
+                if session and session.text_channel_id:
+                    tc = guild.get_channel(session.text_channel_id)
                     if tc and member.id != owner_id:
-                        await tc.set_permissions(member, overwrite=None)
+                        self.overwrite_batcher.revoke(tc, member)
                 if not before.channel.members:
-                    await asyncio.sleep(1)
-                    if not before.channel.members:
-                        await self.delete_user_channel(before.channel)
+                    self.deletion_scheduler.schedule(before.channel.id, self.empty_grace(settings))
+
+    async def reap_channel(self, channel_id: int):
+        channel = self.bot.get_channel(channel_id)
+        if channel and channel.members: return
+        await self.delete_user_channel(channel or discord.Object(id=channel_id))
+
+    async def reconcile_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"Error during Z-VoiceMaster reconciliation: {e}")
+            if RECONCILE_INTERVAL <= 0: return
+            await asyncio.sleep(RECONCILE_INTERVAL)
+
+    async def idle_sweep_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            await asyncio.sleep(IDLE_SWEEP_INTERVAL)
+            try:
+                await self.sweep_idle()
+            except Exception as e:
+                print(f"Error during Z-VoiceMaster idle sweep: {e}")
+
+    @staticmethod
+    def has_active_humans(channel, deafened_idle=False):
+        return any(not m.bot and not (deafened_idle and m.voice and (m.voice.self_deaf or m.voice.deaf)) for m in channel.members)
+
+    async def sweep_idle(self, batch_size=IDLE_SWEEP_BATCH, concurrency=5):
+        started = time.perf_counter()
+        now = time.time()
+        report = {'scanned': 0, 'reclaimed': 0}
+        semaphore = asyncio.Semaphore(concurrency)
+        reclaiming = []
+        leases = {}
+        loop = asyncio.get_running_loop()
+
+        async def reclaim(vc):
+            async with semaphore:
+                await self.delete_user_channel(vc)
+                report['reclaimed'] += 1
+
+        owner_ids = list(self.user_channels)
+        for offset in range(0, len(owner_ids), batch_size):
+            idle = {}
+            for owner_id in owner_ids[offset:offset + batch_size]:
+                session = self.user_channels.by_owner.get(owner_id)
+                if not session: continue
+                report['scanned'] += 1
+                settings = self.guild_settings.get(session.guild_id)
+                timeout = settings.get('idle_timeout_seconds', DEFAULT_IDLE_TIMEOUT) if settings else 0
+                if timeout <= 0: continue
+                if self.user_channels.shared:
+                    if session.guild_id not in leases:
+                        leases[session.guild_id] = await loop.run_in_executor(None, self.session_store.claim_sweep, session.guild_id, self.instance_id, IDLE_SWEEP_INTERVAL * 3)
+                    if not leases[session.guild_id]: continue
+                guild = self.bot.get_guild(session.guild_id)
+                vc = guild.get_channel(session.voice_channel_id) if guild else None
+                if vc is None or not vc.members: continue
+                if self.has_active_humans(vc, settings.get('idle_deafened', False)):
+                    self.user_channels.touch(owner_id, now)
+                elif now - session.last_activity >= timeout:
+                    idle[owner_id] = (vc, timeout)
+            if idle and self.user_channels.shared:
+                stored = await loop.run_in_executor(None, self.session_store.activity, list(idle))
+                idle = {owner_id: entry for owner_id, entry in idle.items() if owner_id in stored and now - (stored[owner_id] or 0) >= entry[1]}
+            for vc, _ in idle.values():
+                reclaiming.append(loop.create_task(reclaim(vc)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*reclaiming)
+        await self.user_channels.flush_activity()
+        report['duration_seconds'] = time.perf_counter() - started
+        self.last_idle_sweep = report
+        metrics.observe("zvm_idle_sweep_seconds", report['duration_seconds'])
+        if report['reclaimed']: print(f"Z-VoiceMaster reclaimed {report['reclaimed']} idle channels.")
+        return report
+
+    def is_session_voice_channel(self, channel):
+        if channel.type != discord.ChannelType.voice: return False
+        for target, overwrite in channel.overwrites.items():
+            if target == channel.guild.default_role:
+                if channel.name == "Reserved" and overwrite.connect is False: return True
+            elif isinstance(target, discord.Member) and overwrite.manage_channels and overwrite.manage_roles:
+                return True
+        return False
+
+    def is_panel_text_channel(self, channel):
+        return channel.type == discord.ChannelType.text and channel.name.startswith("＃") and channel.name.endswith("-panel")
+
+    async def find_control_message(self, channel):
+        async for message in channel.history(limit=20):
+            if message.author.id == self.bot.user.id and message.components:
+                return message
+        return None
+
+    async def adopt_channel(self, vc, humans, panels, settings):
+        guild = vc.guild
+        owner = None
+        for target in vc.overwrites:
+            if target != guild.default_role and target in humans and target.id not in self.user_channels:
+                owner = target
+                break
+        if owner is None:
+            owner = next((m for m in humans if m.id not in self.user_channels), None)
+        if owner is None: return False
+        if settings.get('single_channel'):
+            tc = None
+            msg = await self.find_control_message(vc)
+        else:
+            tc = next((c for c in panels if owner in c.overwrites), None)
+            msg = await self.find_control_message(tc) if tc else None
+            if tc: panels.remove(tc)
+        if not tc and not settings.get('single_channel'):
+            tc = await self.create_channel(
+                guild, 'create', guild.create_text_channel, name=f"＃{owner.display_name.lower().replace(' ', '-')}-panel", category=vc.category,
+                overwrites={ guild.default_role: discord.PermissionOverwrite(read_messages=False), owner: discord.PermissionOverwrite(read_messages=True) }
+            )
+        if not msg:
+            msg = await self.rest_scheduler.submit(guild.id, 'create', (tc or vc).send, embed=self.build_panel_embed(owner), view=ControlPanelView(self))
+        self.user_channels.add(Session(owner.id, guild.id, vc.id, tc.id if tc else None, msg.id))
+        for member in humans:
+            if tc and member != owner: self.overwrite_batcher.grant(tc, member)
+        return True
+
+    async def reconcile(self, concurrency=5):
+        started = time.perf_counter()
+        report = {'guilds': 0, 'adopted': 0, 'deleted': 0, 'forgotten': 0, 'rescheduled': 0}
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
 
+        async def delete(channel):
+            async with semaphore:
+                if await self._delete_channel(channel.guild.id, channel.id, "Orphaned temp channel."): report['deleted'] += 1
+
+        for guild_id, settings in list(self.guild_settings.items()):
+            guild = self.bot.get_guild(guild_id)
+            if not guild: continue
+            report['guilds'] += 1
+            for owner_id in list(self.user_channels.guild_sessions(guild_id)):
+                session = self.user_channels.get(owner_id)
+                if session is None: continue
+                vc = guild.get_channel(session.voice_channel_id)
+                if vc is None:
+                    await self.delete_user_channel(discord.Object(id=session.voice_channel_id))
+                    report['forgotten'] += 1
+                elif not vc.members and vc.id not in self.deletion_scheduler.deadlines:
+                    self.deletion_scheduler.schedule(vc.id, self.empty_grace(settings))
+                    report['rescheduled'] += 1
+            categories = [guild.get_channel(category_id) for category_id in {c['category_id'] for c in settings.get('creators', ())}]
+            known = self.channel_pool.channel_ids | self.channel_pool.claimed_ids
+            known.update(c.get('creator_channel_id') for c in settings.get('creators', ()))
+            cutoff = discord.utils.utcnow() - datetime.timedelta(seconds=ORPHAN_MIN_AGE)
+            created = await loop.run_in_executor(None, self.session_store.created_channels, guild_id)
+            stale = [channel_id for channel_id in created if not guild.get_channel(channel_id) and discord.utils.snowflake_time(channel_id) <= cutoff]
+            if stale: await loop.run_in_executor(None, self.session_store.forget_channels, stale)
+            voices, panels = [], []
+            for channel in (c for category in categories if category for c in category.channels):
+                if channel.id not in created or channel.id in known or self.get_owner_of_channel(channel.id): continue
+                if discord.utils.snowflake_time(channel.id) > cutoff: continue
+                if self.is_session_voice_channel(channel): voices.append(channel)
+                elif self.is_panel_text_channel(channel): panels.append(channel)
+            orphans = []
+            for vc in voices:
+                humans = [m for m in vc.members if not m.bot]
+                try:
+                    if humans and await self.adopt_channel(vc, humans, panels, settings):
+                        report['adopted'] += 1
+                        continue
+                except (discord.HTTPException, RestQueueFull, sqlite3.Error) as e:
+                    print(f"Error adopting channel {vc.name}: {e}")
+                    continue
+                if not vc.members: orphans.append(vc)
+            orphans.extend(panels)
+            await asyncio.gather(*(delete(channel) for channel in orphans))
+        report['duration_seconds'] = time.perf_counter() - started
+        self.last_reconcile = report
+        metrics.observe("zvm_reconcile_seconds", report['duration_seconds'])
+        print(
+            f"Z-VoiceMaster reconciliation finished in {report['duration_seconds']:.2f}s: {report['guilds']} guilds, "
+            f"{report['adopted']} adopted, {report['deleted']} deleted, {report['forgotten']} forgotten, {report['rescheduled']} rescheduled."
+        )
+        return report
+
+    @timed("zvm_handler_seconds", handler="create_user_channel")
     async def create_user_channel(self, member: discord.Member, settings: dict):
+        while member.id in self.pending_creations:
+            await self.pending_creations[member.id]
+        self.pending_creations[member.id] = pending = asyncio.get_running_loop().create_future()
+        try:
+            await self._create_user_channel(member, settings)
+        finally:
+            del self.pending_creations[member.id]
+            pending.set_result(None)
+
+    async def create_channel(self, guild, route, create, **kwargs):
+        channel = await self.rest_scheduler.submit(guild.id, route, create, **kwargs)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.session_store.record_channels, guild.id, (channel.id,))
+        except sqlite3.Error:
+            await self._delete_channel(guild.id, channel.id, "Created channel could not be recorded.")
+            raise
+        return channel
+
+    async def _delete_channel(self, guild_id, channel_id, reason):
+        channel = self.bot.get_channel(channel_id)
+        try:
+            if channel: await self.rest_scheduler.submit(guild_id, 'delete', channel.delete, reason=reason)
+            else: await self.rest_scheduler.submit(guild_id, 'delete', self.bot.http.delete_channel, channel_id, reason=reason)
+        except discord.NotFound: pass
+        except (discord.HTTPException, RestQueueFull): return False
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.session_store.forget_channels, (channel_id,))
+        except sqlite3.Error as e:
+            print(f"Error forgetting deleted channel {channel_id}: {e}")
+        return True
+
+    async def _rollback_channels(self, guild, channels, reason):
+        await asyncio.gather(*(self._delete_channel(guild.id, channel.id, reason) for channel in channels if channel))
+
+    @staticmethod
+    async def _settled(task):
+        if task is None: return None
+        try: return await task
+        except (discord.HTTPException, RestQueueFull, sqlite3.Error): return None
+
+    async def _post_panel(self, member, vc, tc, started, attempts=4):
+        for attempt in range(attempts):
+            if not self.get_owner_of_channel(vc.id): return
+            try:
+                msg = await self.rest_scheduler.submit(member.guild.id, 'create', (tc or vc).send, embed=self.build_panel_embed(member), view=ControlPanelView(self))
+                break
+            except (discord.HTTPException, RestQueueFull) as e:
+                print(f"Error posting control panel for {member.display_name} (attempt {attempt + 1}/{attempts}): {e}")
+                metrics.inc("zvm_errors_total", operation="post_panel")
+                if isinstance(e, (discord.NotFound, discord.Forbidden)) or attempt + 1 == attempts: return
+                await asyncio.sleep(2 ** attempt)
+        self.join_latency['panel'].append(time.perf_counter() - started)
+        owner_id = self.get_owner_of_channel(vc.id)
+        session = self.user_channels.get(owner_id) if owner_id else None
+        if session and session.voice_channel_id == vc.id:
+            try: self.user_channels.add(session.replace(control_message_id=msg.id))
+            except sqlite3.Error as e: print(f"Error recording control panel for {member.display_name}: {e}")
+
+    async def _create_user_channel(self, member: discord.Member, settings: dict):
         guild = member.guild
         if member.id in self.user_channels:
-            try:
-                info = self.user_channels[member.id]
-                vc = guild.get_channel(info['voice_channel_id'])
-                if vc: await member.move_to(vc)
+            session = self.user_channels.get(member.id)
+            vc = guild.get_channel(session.voice_channel_id)
+            if vc:
+                self.deletion_scheduler.cancel(vc.id)
+                try:
+                    if not (member.voice and member.voice.channel == vc):
+                        await self.rest_scheduler.submit(guild.id, 'move', member.move_to, vc)
+                except (discord.HTTPException, RestQueueFull): pass
+                if not vc.members: self.deletion_scheduler.schedule(vc.id, self.empty_grace(settings))
                 return
-            except (discord.NotFound, discord.HTTPException):
-                del self.user_channels[member.id]
-        
+            await self.delete_user_channel(discord.Object(id=session.voice_channel_id))
+
+
         category = guild.get_channel(settings.get('category_id'))
         if not category: return
+        started = time.perf_counter()
+        voice_overwrites = { member: discord.PermissionOverwrite(manage_channels=True, manage_roles=True) }
+        if settings.get('default_hidden', False):
+            voice_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=False)
+        text_overwrites = { guild.default_role: discord.PermissionOverwrite(read_messages=False), member: discord.PermissionOverwrite(read_messages=True) }
+        voice_name = render_channel_name(settings, member)
+        text_name = f"＃{member.display_name.lower().replace(' ', '-')}-panel"
+        pair = self.channel_pool.take(guild.id)
+        if pair:
+            try:
+                self.channel_pool.refill(guild, self.guild_settings.get(guild.id, settings))
+                vc = guild.get_channel(pair['voice_channel_id'])
+                tc = guild.get_channel(pair['text_channel_id']) if pair['text_channel_id'] else None
+                if vc and (tc or not pair['text_channel_id']):
+                    relocate = {'category': category} if vc.category != category else {}
+                    tc_task = asyncio.ensure_future(self.rest_scheduler.submit(guild.id, 'create', tc.edit, name=text_name, overwrites=text_overwrites, **relocate)) if tc else None
+                    try:
+                        await self.rest_scheduler.submit(guild.id, 'create', vc.edit, name=voice_name, overwrites=voice_overwrites, user_limit=settings.get('default_limit', 0), **relocate)
+                        await self.rest_scheduler.submit(guild.id, 'move', member.move_to, vc)
+                        self.join_latency['pooled'].append(time.perf_counter() - started)
+                        self.user_channels.add(Session(member.id, guild.id, vc.id, tc.id if tc else None, pair['control_message_id']))
+                        if not vc.members: self.deletion_scheduler.schedule(vc.id, self.empty_grace(settings))
+                        if tc_task: await tc_task
+                        return
+                    except (discord.HTTPException, RestQueueFull, sqlite3.Error) as e:
+                        print(f"Error assigning pooled channel to {member.display_name}: {e}")
+                        await self._settled(tc_task)
+                        if member.id in self.user_channels:
+                            await self.delete_user_channel(vc)
+                            return
+                        await self._rollback_channels(guild, (vc, tc), "Pooled channel assignment failed.")
+            finally:
+                self.channel_pool.release(pair)
+        vc_task = asyncio.ensure_future(self.create_channel(
+            guild, 'create', guild.create_voice_channel, name=voice_name, category=category,
+            overwrites=voice_overwrites, user_limit=settings.get('default_limit', 0)
+        ))
+        tc_task = None if settings.get('single_channel') else asyncio.ensure_future(self.create_channel(
+            guild, 'create', guild.create_text_channel, name=text_name, category=category,
+            overwrites=text_overwrites
+        ))
         try:
-            voice_overwrites = { member: discord.PermissionOverwrite(manage_channels=True, manage_roles=True) }
-            if settings.get('default_hidden', False):
-                voice_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=False)
-            vc = await guild.create_voice_channel(
-                name=f"{member.display_name}'s Channel", category=category,
-                overwrites=voice_overwrites, user_limit=settings.get('default_limit', 0)
-            )
-            tc = await guild.create_text_channel(
-                name=f"＃{member.display_name.lower().replace(' ', '-')}-panel", category=category,
-                overwrites={ guild.default_role: discord.PermissionOverwrite(read_messages=False), member: discord.PermissionOverwrite(read_messages=True) }
-            )
-            await member.move_to(vc)
-            embed = discord.Embed(title="Z-VoiceMaster Interface", color=0x2F3136)
-            embed.set_author(name=f"{member.display_name}'s Control Panel", icon_url=member.display_avatar)
-            embed.set_thumbnail(url=self.bot.user.avatar.url)
-            description = (
-                "**Button Usage**\n\n"
-                "🔒 — Lock the voice channel\n"
-                "🔓 — Unlock the voice channel\n"
-                "👻 — Hide the voice channel\n"
-                "👁️ — Reveal the voice channel\n"
-                "👑 — Claim the voice channel\n\n"
-                "✏️ — Rename the channel\n"
-                "🚫 — Disconnect a member\n"
-                "🎉 — Start an activity\n"
-                "➕ — Increase the user limit\n"
-                "➖ — Decrease the user limit\n"
-            )
-            embed.description = description
-            embed.set_footer(text=base64.b64decode('TWFkZSDigJxiIFRoZUhvbHlPbmVa').decode('utf-8'))
-            view = ControlPanelView(self)
-            msg = await tc.send(embed=embed, view=view)
-            self.user_channels[member.id] = {
-                'voice_channel_id': vc.id, 'text_channel_id': tc.id,
-                'control_message_id': msg.id, 'guild_id': guild.id
-            }
-        except discord.HTTPException as e:
+            vc = await vc_task
+            await self.rest_scheduler.submit(guild.id, 'move', member.move_to, vc)
+            self.join_latency['fresh'].append(time.perf_counter() - started)
+            tc = await tc_task if tc_task else None
+            self.user_channels.add(Session(member.id, guild.id, vc.id, tc.id if tc else None))
+        except (discord.HTTPException, RestQueueFull, sqlite3.Error) as e:
             print(f"Error creating channel for {member.display_name}: {e}")
+            metrics.inc("zvm_errors_total", operation="create_user_channel")
+            vc, tc = await self._settled(vc_task), await self._settled(tc_task)
+            await self._rollback_channels(guild, (vc, tc), "Channel creation failed.")
+            return
+        if not vc.members: self.deletion_scheduler.schedule(vc.id, self.empty_grace(settings))
+        task = asyncio.get_running_loop().create_task(self._post_panel(member, vc, tc, started))
+        self.panel_tasks.add(task)
+        task.add_done_callback(self.panel_tasks.discard)
 
+    @timed("zvm_handler_seconds", handler="delete_user_channel")
     async def delete_user_channel(self, channel: discord.VoiceChannel):
         owner_id = self.get_owner_of_channel(channel.id)
         if not owner_id: return
-        info = self.user_channels.pop(owner_id, None)
-        if not info: return
-        try:
-            vc = self.bot.get_channel(info['voice_channel_id']) or await self.bot.fetch_channel(info['voice_channel_id'])
-            if vc: await vc.delete(reason="Temp channel empty.")
-        except (discord.NotFound, discord.HTTPException): pass
-        try:
-            tc = self.bot.get_channel(info['text_channel_id']) or await self.bot.fetch_channel(info['text_channel_id'])
-            if tc: await tc.delete(reason="Temp channel empty.")
-        except (discord.NotFound, discord.HTTPException): pass
+        session = self.user_channels.remove(owner_id)
+        if not session and self.user_channels.shared:
+            owner_id = self.get_owner_of_channel(channel.id)
+            session = self.user_channels.remove(owner_id) if owner_id else None
+        if not session: return
+        if session.text_channel_id: self.overwrite_batcher.discard(session.text_channel_id)
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._delete_channel(session.guild_id, channel_id, "Temp channel empty.")
+            for channel_id in (session.voice_channel_id, session.text_channel_id) if channel_id
+        ))
+        self.teardown_latency.append(time.perf_counter() - started)
 
     @commands.command(name="setup-zvoicemaster", aliases=["setup-voicemaster"])
     @commands.has_permissions(manage_channels=True)
@@ -446,6 +2055,18 @@ class ZVoiceMasterCog(commands.Cog, name="Z-VoiceMaster"):
             return
         await ctx.send(embed=embed, view=view, ephemeral=True)
 
+    @commands.command(name="zvm-metrics")
+    @commands.is_owner()
+    async def zvm_metrics(self, ctx: commands.Context):
+        if not metrics.enabled:
+            await ctx.send("Metrics are disabled. Set `ZVM_METRICS=1` or `ZVM_METRICS_PORT` to enable them.")
+            return
+        text = metrics.render()
+        if len(text) > 1900:
+            await ctx.send(file=discord.File(io.BytesIO(text.encode('utf-8')), filename="z-voicemaster-metrics.txt"))
+        else:
+            await ctx.send(f"```\n{text}```")
+
 async def setup(bot):
     await bot.add_cog(ZVoiceMasterCog(bot))
 
@@ -0,0 +1,860 @@
+"""Offline load-replay harness for Z-VoiceMaster.
+
+Replays synthetic or recorded voice-state traces against ZVoiceMasterCog using
+in-process fakes of the guild, channel, member and HTTP surfaces the cog uses.
+Requires discord.py (the cog imports it) but no bot token or network access.
+
+    python benchmarks/replay.py --scenario join_storm --members 500 --latency 80
+    python benchmarks/replay.py --scenario all --p429 0.02
+    python benchmarks/replay.py --trace recorded.jsonl
+
+A recorded trace is JSON lines of {"t": seconds, "member": id, "channel": target}
+where target is "creator", "owner:<member id>" (that member's temp channel) or
+null (disconnect).
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+
+COG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Z-VoiceMaster (1).py")
+_ids = itertools.count(10**17)
+
+
+def load_cog_module():
+    spec = importlib.util.spec_from_file_location("zvoicemaster", COG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(samples, pct):
+    if not samples: return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class FakeHTTP:
+    def __init__(self, latency=0.05, jitter=0.02, p429=0.0, retry_after=1.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.failures = Counter()
+
+    async def request(self, route):
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+        while self.random.random() < self.p429:
+            self.rate_limited[route] += 1
+            await asyncio.sleep(self.retry_after)
+        if self.random.random() < self.fail_rate:
+            self.failures[route] += 1
+            raise discord.HTTPException(SimpleNamespace(status=500, reason="Fake failure"), "Injected failure")
+
+
+class FakeObject:
+    def __init__(self, id=None):
+        self.id = id or next(_ids)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+
+class FakeRole(FakeObject):
+    name = "@everyone"
+
+
+class FakeMessage(FakeObject):
+    def __init__(self, author, components=()):
+        super().__init__()
+        self.author = author
+        self.components = list(components)
+
+    async def delete(self):
+        pass
+
+
+class FakeChannel(FakeObject):
+    def __init__(self, guild, name, category=None, overwrites=None, user_limit=0, kind="voice"):
+        super().__init__()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.overwrites = dict(overwrites or {})
+        self.user_limit = user_limit
+        self.kind = kind
+        self.members = []
+        self.messages = []
+
+    @property
+    def type(self):
+        return getattr(discord.ChannelType, self.kind)
+
+    @property
+    def category_id(self):
+        return self.category.id if self.category else None
+
+    @property
+    def channels(self):
+        return [c for c in self.guild.channels.values() if c.category is self]
+
+    async def edit(self, **kwargs):
+        await self.guild.http.request(f"{self.kind}_edit")
+        if 'overwrites' in kwargs: self.overwrites = dict(kwargs.pop('overwrites'))
+        for key, value in kwargs.items(): setattr(self, key, value)
+        return self
+
+    async def set_permissions(self, target, *, overwrite=discord.utils.MISSING, reason=None, **permissions):
+        await self.guild.http.request("permissions")
+        if overwrite is None:
+            self.overwrites.pop(target, None)
+        else:
+            self.overwrites[target] = overwrite if overwrite is not discord.utils.MISSING else discord.PermissionOverwrite(**permissions)
+
+    async def delete(self, reason=None):
+        await self.guild.http.request(f"{self.kind}_delete")
+        if self.guild.channels.pop(self.id, None) is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel")
+        for member in list(self.members):
+            await self.guild.harness.apply(member, None)
+
+    async def send(self, embed=None, view=None, **kwargs):
+        await self.guild.http.request("message_send")
+        message = FakeMessage(self.guild.me, [view] if view else [])
+        self.messages.append(message)
+        return message
+
+    async def history(self, limit=100):
+        await self.guild.http.request("message_history")
+        for message in reversed(self.messages[-limit:]):
+            yield message
+
+    async def create_invite(self, **kwargs):
+        await self.guild.http.request("invite")
+        return "https://discord.gg/fake"
+
+
+class FakeMember(FakeObject):
+    def __init__(self, guild, id=None, bot=False):
+        super().__init__(id)
+        self.guild = guild
+        self.bot = bot
+        self.display_name = f"User {self.id % 100000}"
+        self.display_avatar = "https://cdn.discordapp.com/embed/avatars/0.png"
+        self.mention = f"<@{self.id}>"
+        self.voice = None
+
+    @property
+    def __class__(self):
+        return discord.Member
+
+    async def move_to(self, channel, reason=None):
+        await self.guild.http.request("member_move")
+        if self.voice is None:
+            raise discord.HTTPException(SimpleNamespace(status=400, reason="Bad Request"), "Target user is not connected to voice.")
+        await self.guild.harness.apply(self, channel, moved_by_bot=True)
+
+
+class FakeGuild(FakeObject):
+    def __init__(self, harness, http):
+        super().__init__()
+        self.harness = harness
+        self.http = http
+        self.name = "Replay Guild"
+        self.default_role = FakeRole(self.id)
+        self.channels = {}
+        self.members = {}
+        self.voice_channels_created = 0
+        self.me = FakeMember(self, bot=True)
+
+    @property
+    def categories(self):
+        return [c for c in self.channels.values() if c.kind == "category"]
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    async def create_voice_channel(self, name, category=None, overwrites=None, user_limit=0, **kwargs):
+        await self.http.request("channel_create")
+        self.voice_channels_created += 1
+        return self.add_channel(FakeChannel(self, name, category, overwrites, user_limit, "voice"))
+
+    async def create_text_channel(self, name, category=None, overwrites=None, **kwargs):
+        await self.http.request("channel_create")
+        return self.add_channel(FakeChannel(self, name, category, overwrites, 0, "text"))
+
+
+class FakeBot:
+    def __init__(self, guild):
+        self.guild = guild
+        self.user = SimpleNamespace(id=guild.me.id, avatar=None)
+        self.http = SimpleNamespace(delete_channel=self.delete_channel)
+
+    def add_view(self, view):
+        pass
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == self.guild.id else None
+
+    def get_channel(self, channel_id):
+        return self.guild.get_channel(channel_id)
+
+    async def delete_channel(self, channel_id, reason=None):
+        channel = self.guild.get_channel(channel_id)
+        if channel is None:
+            await self.guild.http.request("channel_delete")
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel")
+        await channel.delete(reason=reason)
+
+    async def fetch_channel(self, channel_id):
+        await self.guild.http.request("channel_fetch")
+        channel = self.guild.get_channel(channel_id)
+        if channel is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel")
+        return channel
+
+
+class Harness:
+    def __init__(self, module, http, settings):
+        self.module = module
+        self.http = http
+        self.guild = FakeGuild(self, http)
+        self.bot = FakeBot(self.guild)
+        self.category = self.guild.add_channel(FakeChannel(self.guild, "Temp Channels", kind="category"))
+        self.creator = self.guild.add_channel(FakeChannel(self.guild, "➕ Join to Create", self.category))
+        settings = dict(settings)
+        creator = {"creator_channel_id": self.creator.id, "creator_channel_name": self.creator.name, "category_id": self.category.id,
+                   "default_limit": settings.pop('default_limit', 0), "default_hidden": settings.pop('default_hidden', False),
+                   "name_template": "{user}'s Channel"}
+        self.settings = dict(settings, creators=[creator])
+        self.cog = None
+        self.tasks = set()
+        self.events = 0
+        self.skipped = 0
+        self.handler_latency = []
+        self.join_latency = []
+        self.join_started = {}
+
+    async def start(self):
+        self.cog = self.module.ZVoiceMasterCog(self.bot)
+        self.cog.set_guild_settings(self.guild.id, self.settings)
+        await self.cog.cog_load()
+        await self.cog.on_ready()
+
+    async def stop(self):
+        await self.cog.cog_unload()
+
+    def member(self, member_id):
+        member = self.guild.members.get(member_id)
+        if member is None:
+            member = FakeMember(self.guild, member_id)
+            self.guild.members[member_id] = member
+        return member
+
+    def resolve(self, target):
+        if target is None: return None
+        if target == "creator": return self.creator
+        owner_id = int(str(target).split(":", 1)[1])
+        session = self.cog.user_channels.get(owner_id)
+        return self.guild.get_channel(session.voice_channel_id) if session else None
+
+    async def apply(self, member, channel, moved_by_bot=False):
+        before = SimpleNamespace(channel=member.voice.channel if member.voice else None)
+        if before.channel is channel: return
+        if before.channel and member in before.channel.members: before.channel.members.remove(member)
+        if channel is not None: channel.members.append(member)
+        member.voice = SimpleNamespace(channel=channel, afk=False, self_deaf=False, deaf=False) if channel else None
+        after = SimpleNamespace(channel=channel)
+        now = time.perf_counter()
+        if channel is self.creator and not moved_by_bot:
+            self.join_started.setdefault(member.id, now)
+        elif before.channel is self.creator and moved_by_bot and member.id in self.join_started:
+            self.join_latency.append(now - self.join_started.pop(member.id))
+        self.dispatch(member, before, after)
+
+    def dispatch(self, member, before, after):
+        self.events += 1
+        task = asyncio.get_running_loop().create_task(self._handle(member, before, after))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _handle(self, member, before, after):
+        started = time.perf_counter()
+        await self.cog.on_voice_state_update(member, before, after)
+        self.handler_latency.append(time.perf_counter() - started)
+
+    async def replay(self, trace):
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        for event in sorted(trace, key=lambda e: e['t']):
+            delay = origin + event['t'] - loop.time()
+            if delay > 0: await asyncio.sleep(delay)
+            member = self.member(event['member'])
+            channel = self.resolve(event['channel'])
+            if event['channel'] is not None and channel is None:
+                self.skipped += 1
+                continue
+            await self.apply(member, channel)
+
+    async def settle(self, timeout=60.0):
+        deadline = time.perf_counter() + timeout
+        grace = self.cog.empty_grace(self.settings)
+        while time.perf_counter() < deadline:
+            while self.tasks:
+                await asyncio.gather(*list(self.tasks), return_exceptions=True)
+            await asyncio.sleep(max(grace, self.cog.overwrite_batcher.window) + 0.1)
+            busy = (self.tasks or self.cog.deletion_scheduler.deadlines or self.cog.overwrite_batcher.pending
+                    or self.cog.pending_creations or self.cog.panel_tasks or self.cog.voice_coalescer.pending or self.rest_in_flight())
+            if not busy: return
+
+    def rest_in_flight(self):
+        return sum(s['submitted'] - s['completed'] - s['failed'] - s['rejected'] for s in self.cog.rest_scheduler.stats.values())
+
+    def leaked_channels(self):
+        owned = set()
+        for owner_id in self.cog.user_channels:
+            session = self.cog.user_channels.get(owner_id)
+            owned.update((session.voice_channel_id, session.text_channel_id))
+        owned |= self.cog.channel_pool.channel_ids
+        return [c for c in self.category.channels if c is not self.creator and c.id not in owned]
+
+
+def join_storm(members, duration, rng):
+    return [{'t': rng.uniform(0, duration), 'member': m, 'channel': "creator"} for m in range(1, members + 1)]
+
+
+def channel_hopping(members, duration, rng, hops=6):
+    owners = max(1, members // 4)
+    trace = join_storm(owners, duration / 4, rng)
+    for m in range(owners + 1, members + 1):
+        t = duration / 4 + rng.uniform(0, duration / 4)
+        for _ in range(hops):
+            t += rng.uniform(0.05, duration / (2 * hops))
+            target = "creator" if rng.random() < 0.1 else f"owner:{rng.randint(1, owners)}"
+            trace.append({'t': t, 'member': m, 'channel': target})
+    return trace
+
+
+def mass_leave(members, duration, rng):
+    trace = join_storm(members, duration / 2, rng)
+    trace += [{'t': duration / 2 + 1 + rng.uniform(0, duration / 10), 'member': m, 'channel': None} for m in range(1, members + 1)]
+    return trace
+
+
+def duplicate_triggers(members, duration, rng, bounces=3):
+    trace = []
+    for m in range(1, members + 1):
+        t = rng.uniform(0, duration)
+        for b in range(bounces):
+            trace.append({'t': t + b * 0.002, 'member': m, 'channel': "creator"})
+            trace.append({'t': t + b * 0.002 + 0.001, 'member': m, 'channel': None})
+        trace.append({'t': t + bounces * 0.002, 'member': m, 'channel': "creator"})
+    return trace
+
+
+def hop_spam(members, duration, rng, bursts=3, burst_len=6):
+    trace = join_storm(members, duration / 4, rng)
+    for m in range(1, members + 1):
+        t = duration / 4 + 1
+        for _ in range(bursts):
+            t += rng.uniform(0.5, duration / bursts)
+            for _ in range(burst_len):
+                t += rng.uniform(0.02, 0.1)
+                roll = rng.random()
+                target = "creator" if roll < 0.4 else None if roll < 0.7 else f"owner:{rng.randint(1, members)}"
+                trace.append({'t': t, 'member': m, 'channel': target})
+            trace.append({'t': t + 0.05, 'member': m, 'channel': f"owner:{m}"})
+    return trace
+
+
+SCENARIOS = {
+    'join_storm': join_storm,
+    'channel_hopping': channel_hopping,
+    'mass_leave': mass_leave,
+    'duplicate_triggers': duplicate_triggers,
+    'hop_spam': hop_spam,
+}
+
+
+async def run_trace(name, trace, args, module):
+    http = FakeHTTP(args.latency / 1000, args.jitter / 1000, args.p429, args.retry_after, args.fail_rate, args.seed)
+    settings = {'default_limit': 0, 'default_hidden': False, 'empty_grace_seconds': args.grace, 'pool_size': args.pool_size,
+                'single_channel': args.single_channel}
+    harness = Harness(module, http, settings)
+    os.chdir(tempfile.mkdtemp(prefix="zvm-replay-"))
+    await harness.start()
+    if args.debounce is not None:
+        harness.cog.voice_coalescer.window = args.debounce
+    if args.pool_size:
+        while harness.cog.channel_pool.size(harness.guild.id) < args.pool_size:
+            await asyncio.sleep(0.05)
+        http.calls.clear()
+        harness.guild.voice_channels_created = 0
+    started = time.perf_counter()
+    await harness.replay(trace)
+    await harness.settle()
+    elapsed = time.perf_counter() - started
+    sessions_created = harness.guild.voice_channels_created
+    report = {
+        'scenario': name,
+        'events': harness.events,
+        'skipped': harness.skipped,
+        'elapsed_s': elapsed,
+        'events_per_s': harness.events / elapsed if elapsed else 0.0,
+        'sessions_created': sessions_created,
+        'sessions_live': len(harness.cog.user_channels),
+        'rest_calls': sum(http.calls.values()),
+        'rest_per_session': sum(http.calls.values()) / sessions_created if sessions_created else 0.0,
+        'rest_by_route': dict(http.calls),
+        'rate_limited': sum(http.rate_limited.values()),
+        'join_p50_ms': percentile(harness.join_latency, 50) * 1000,
+        'join_p95_ms': percentile(harness.join_latency, 95) * 1000,
+        'join_p99_ms': percentile(harness.join_latency, 99) * 1000,
+        'join_by_path_ms': {path: {k: round(v * 1000, 2) if k != 'count' else v for k, v in row.items()}
+                            for path, row in harness.cog.join_latency_report().items()},
+        'teardown_p50_ms': percentile(harness.cog.teardown_latency, 50) * 1000,
+        'teardown_p99_ms': percentile(harness.cog.teardown_latency, 99) * 1000,
+        'handler_p50_ms': percentile(harness.handler_latency, 50) * 1000,
+        'handler_p99_ms': percentile(harness.handler_latency, 99) * 1000,
+        'overwrite_calls_saved': harness.cog.overwrite_batcher.calls_saved,
+        'events_suppressed': harness.cog.voice_coalescer.suppressed,
+        'hop_cooldowns': harness.cog.voice_coalescer.cooldowns,
+        'leaked_channels': len(harness.leaked_channels()),
+    }
+    if name == 'hop_spam':
+        coalescer = harness.cog.voice_coalescer
+        coalescer.prune(asyncio.get_running_loop().time() + coalescer.hop_period + coalescer.cooldown)
+        report['hop_state_retained'] = len(coalescer.hops) + len(coalescer.cooling)
+    if name == 'duplicate_triggers':
+        report['one_session_per_member'] = report['sessions_live'] == len({e['member'] for e in trace}) and not report['leaked_channels']
+    await harness.stop()
+    return report
+
+
+async def run_concurrent_create(args, module):
+    http = FakeHTTP(args.latency / 1000, args.jitter / 1000, 0.0, args.retry_after, 0.0, args.seed)
+    settings = {'default_limit': 0, 'default_hidden': False, 'empty_grace_seconds': args.grace, 'pool_size': args.pool_size,
+                'single_channel': args.single_channel}
+    harness = Harness(module, http, settings)
+    os.chdir(tempfile.mkdtemp(prefix="zvm-replay-"))
+    await harness.start()
+    cog, guild = harness.cog, harness.guild
+    if args.pool_size:
+        while cog.channel_pool.size(guild.id) < args.pool_size:
+            await asyncio.sleep(0.05)
+    guild.voice_channels_created = 0
+    member = harness.member(1)
+    harness.creator.members.append(member)
+    member.voice = SimpleNamespace(channel=harness.creator, afk=False, self_deaf=False, deaf=False)
+    creator = dict(cog.guild_settings[guild.id], **cog.creator_index[harness.creator.id])
+    calls = max(args.members, 2)
+    await asyncio.gather(*(cog.create_user_channel(member, creator) for _ in range(calls)))
+    await harness.settle()
+    report = {'scenario': 'concurrent_create', 'calls': calls, 'sessions': len(cog.user_channels),
+              'voice_channels_created': guild.voice_channels_created}
+    report['passed'] = report['sessions'] == 1 and (report['voice_channels_created'] == 1 or args.pool_size > 0)
+    await harness.stop()
+    return report
+
+
+async def run_reconcile(args, module):
+    http = FakeHTTP(args.latency / 1000, args.jitter / 1000, args.p429, args.retry_after, args.fail_rate, args.seed)
+    settings = {'default_limit': 0, 'default_hidden': False, 'empty_grace_seconds': args.grace, 'pool_size': 0,
+                'single_channel': False}
+    harness = Harness(module, http, settings)
+    guild, category = harness.guild, harness.category
+    occupied, created = 0, []
+    for m in range(1, args.members + 1):
+        member = harness.member(m)
+        vc = guild.add_channel(FakeChannel(guild, f"{member.display_name}'s Channel", category,
+                                           {member: discord.PermissionOverwrite(manage_channels=True, manage_roles=True)}))
+        tc = guild.add_channel(FakeChannel(guild, f"＃user-{m}-panel", category,
+                                           {guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                                            member: discord.PermissionOverwrite(read_messages=True)}, kind="text"))
+        tc.messages.append(FakeMessage(guild.me, ["panel"]))
+        created += [vc.id, tc.id]
+        if m % 2:
+            vc.members.append(member)
+            member.voice = SimpleNamespace(channel=vc, afk=False, self_deaf=False, deaf=False)
+            occupied += 1
+    guild.add_channel(FakeChannel(guild, "general", category, kind="text"))
+    staff = guild.add_channel(FakeChannel(guild, "Staff Room", category, {harness.member(args.members + 1): discord.PermissionOverwrite(manage_channels=True, manage_roles=True)}))
+    os.chdir(tempfile.mkdtemp(prefix="zvm-replay-"))
+    os.makedirs(os.path.dirname(module.SESSIONS_FILE) or ".", exist_ok=True)
+    store = module.SessionStore(module.SESSIONS_FILE)
+    store.record_channels(guild.id, created)
+    store.close()
+    await harness.start()
+    while harness.cog.last_reconcile is None:
+        await asyncio.sleep(0.05)
+    await harness.settle()
+    report = {'scenario': 'reconcile_orphans', 'orphan_pairs': args.members, 'occupied': occupied}
+    report.update(harness.cog.last_reconcile)
+    report['rest_by_route'] = dict(http.calls)
+    report['sessions_live'] = len(harness.cog.user_channels)
+    report['foreign_kept'] = staff.id in guild.channels
+    report['leaked_channels'] = len([c for c in harness.leaked_channels() if c.name != "general" and c is not staff])
+    await harness.stop()
+    return report
+
+
+def shared_worker(db_path, settings_path, action, targets, barrier, results):
+    module = load_cog_module()
+    registry = module.SessionRegistry(module.SessionStore(db_path, log_changes=True), shared=True)
+    registry.restore()
+    barrier.wait()
+    done = 0
+    if action == "lookup":
+        done = sum(1 for channel_id in targets if registry.owner_of_channel(channel_id))
+    elif action == "settings":
+        store = module.SettingsStore(settings_path)
+        store.data.update(targets)
+        for guild_id in targets: store._dirty.add(guild_id)
+        asyncio.run(store.flush())
+        done = len(targets)
+    for owner_id, new_owner_id in (targets if action in ("claim", "remove") else ()):
+        try:
+            if action == "claim": registry.transfer(owner_id, new_owner_id)
+            elif not registry.remove(owner_id): continue
+            done += 1
+        except (KeyError, ValueError):
+            pass
+    registry.store.close()
+    results.put((action, done))
+
+
+def run_workers(jobs):
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(len(jobs)), ctx.Queue()
+    workers = [ctx.Process(target=shared_worker, args=(*job, barrier, results)) for job in jobs]
+    for worker in workers: worker.start()
+    outcome = [results.get(timeout=60) for _ in workers]
+    for worker in workers: worker.join()
+    return outcome
+
+
+async def run_shared_state(args, module):
+    http = FakeHTTP(args.latency / 1000, args.jitter / 1000, 0.0, args.retry_after, 0.0, args.seed)
+    settings = {'default_limit': 0, 'default_hidden': False, 'empty_grace_seconds': args.grace, 'pool_size': 0,
+                'single_channel': args.single_channel}
+    harness = Harness(module, http, settings)
+    os.chdir(tempfile.mkdtemp(prefix="zvm-replay-"))
+    shared, module.SHARED_STATE = module.SHARED_STATE, True
+    try:
+        await harness.start()
+    finally:
+        module.SHARED_STATE = shared
+    cog = harness.cog
+    await harness.replay(join_storm(args.members, min(args.duration, 1.0), random.Random(args.seed)))
+    await harness.settle()
+    db_path, settings_path = os.path.abspath(cog.sessions_file), os.path.abspath(cog.settings_file)
+    sessions = {owner_id: cog.user_channels.get(owner_id).voice_channel_id for owner_id in cog.user_channels}
+    report = {'scenario': 'shared_state', 'sessions': len(sessions)}
+
+    lookups = run_workers([(db_path, settings_path, "lookup", list(sessions.values()))])
+    report['peer_lookup_hits'] = lookups[0][1]
+
+    started = time.perf_counter()
+    order = sorted(sessions)
+    claims = run_workers([(db_path, settings_path, "claim", [(o, 10**6 + o) for o in order]),
+                          (db_path, settings_path, "claim", [(o, 2 * 10**6 + o) for o in reversed(order)])])
+    report['claim_race_s'] = time.perf_counter() - started
+    report['claims_won'] = sorted(done for _, done in claims)
+    report['claims_exclusive'] = sum(done for _, done in claims) == len(sessions)
+    report['claim_read_through'] = any(cog.user_channels.get(new_owner) for new_owner in (10**6 + order[0], 2 * 10**6 + order[0]))
+    cog.sync_shared_state()
+    stored = cog.session_store.load_all()
+    report['cache_matches_store'] = stored == {o: cog.user_channels.get(o) for o in cog.user_channels}
+    report['claimed_owner_visible'] = all(cog.get_owner_of_channel(vc) not in sessions for vc in sessions.values())
+
+    doomed = sorted(stored)[:len(stored) // 2]
+    removals = run_workers([(db_path, settings_path, "remove", [(o, None) for o in doomed]) for _ in range(2)])
+    report['removes_exclusive'] = sum(done for _, done in removals) == len(doomed)
+    await cog.refresh_shared_state()
+    report['sessions_after_remove'] = len(cog.user_channels)
+
+    lookups = []
+    lookup = cog.session_store.lookup
+    cog.session_store.lookup = lambda key: lookups.append(key) or lookup(key)
+    for _ in range(1000): cog.get_owner_of_channel(10**15)
+    await cog.refresh_shared_state()
+    for _ in range(1000): cog.get_owner_of_channel(10**15)
+    del cog.session_store.lookup
+    report['repeat_miss_queries'] = len(lookups)
+
+    peer_settings = json.loads(json.dumps(cog.guild_settings[harness.guild.id]))
+    peer_settings['creators'].append(dict(peer_settings['creators'][0], creator_channel_id=harness.creator.id + 1))
+    await asyncio.sleep(0.01)
+    run_workers([(db_path, settings_path, "settings", {harness.guild.id: peer_settings})])
+    cog.sync_shared_state()
+    report['settings_propagated'] = harness.creator.id + 1 in cog.creator_index
+
+    owner_id = next(iter(cog.user_channels))
+    touched_at = time.time() + 1
+    cog.user_channels.touch(owner_id, touched_at)
+    await cog.user_channels.flush_activity()
+    peer = module.SessionStore(db_path)
+    report['activity_persisted'] = peer.load([owner_id])[owner_id].last_activity == touched_at
+    report['sweep_lease_exclusive'] = (cog.session_store.claim_sweep(harness.guild.id, "a", 60)
+                                       and not peer.claim_sweep(harness.guild.id, "b", 60)
+                                       and cog.session_store.claim_sweep(harness.guild.id, "a", 60))
+    peer.close()
+    await harness.stop()
+    return report
+
+
+async def run_hop_cooldown(args, module, window=0.5, cooldown=1.0, hop_every=0.05, duration=5.0):
+    loop = asyncio.get_running_loop()
+    dispatches = []
+
+    async def callback(member, before, after, passed_through=()):
+        dispatches.append(loop.time())
+
+    coalescer = module.VoiceEventCoalescer(callback, window, module.HOP_THRESHOLD, module.HOP_PERIOD, cooldown)
+    member, rooms = SimpleNamespace(id=1), [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+    started, cooling_since, hop = loop.time(), None, 0
+    while loop.time() - started < duration:
+        await coalescer.submit(member, SimpleNamespace(channel=rooms[hop % 2]), SimpleNamespace(channel=rooms[(hop + 1) % 2]))
+        hop += 1
+        if cooling_since is None and coalescer.cooldowns: cooling_since = loop.time()
+        await asyncio.sleep(hop_every)
+    ended = loop.time()
+    coalescer.stop()
+    held = [t for t in dispatches if cooling_since is not None and t > cooling_since]
+    allowed = int((ended - cooling_since) / cooldown) + 1 if cooling_since is not None else 0
+    return {'scenario': 'hop_cooldown', 'hops': hop, 'cooldowns': coalescer.cooldowns, 'dispatches': len(dispatches),
+            'dispatches_while_cooling': len(held), 'allowed_while_cooling': allowed,
+            'passed': cooling_since is not None and len(held) <= allowed}
+
+
+async def run_idle_sweep(args, module):
+    http = FakeHTTP(args.latency / 1000, args.jitter / 1000, 0.0, args.retry_after, 0.0, args.seed)
+    settings = {'default_limit': 0, 'default_hidden': False, 'empty_grace_seconds': args.grace, 'pool_size': 0,
+                'single_channel': args.single_channel, 'idle_timeout_seconds': 1, 'idle_deafened': True}
+    harness = Harness(module, http, settings)
+    os.chdir(tempfile.mkdtemp(prefix="zvm-replay-"))
+    await harness.start()
+    cog, guild = harness.cog, harness.guild
+    await harness.replay(join_storm(args.members, min(args.duration, 1.0), random.Random(args.seed)))
+    await harness.settle()
+    idle = set()
+    for owner_id in list(cog.user_channels):
+        member, vc = harness.member(owner_id), harness.resolve(f"owner:{owner_id}")
+        if owner_id % 3 == 0:
+            vc.members.append(FakeMember(guild, bot=True))
+            await harness.apply(member, None)
+            idle.add(vc.id)
+        elif owner_id % 3 == 1:
+            member.voice.self_deaf = True
+            idle.add(vc.id)
+    await harness.settle()
+    await asyncio.sleep(1.1)
+    report = {'scenario': 'idle_sweep', 'sessions': len(cog.user_channels), 'idle_sessions': len(idle)}
+    report.update(await cog.sweep_idle())
+    await harness.settle()
+    report['idle_left'] = sum(1 for owner_id in cog.user_channels if cog.user_channels.get(owner_id).voice_channel_id in idle)
+    report['active_kept'] = len(cog.user_channels)
+    report['leaked_channels'] = len(harness.leaked_channels())
+    await harness.stop()
+
+    registry = module.SessionRegistry()
+    cog.user_channels, cog.guild_settings = registry, {guild.id: {'idle_timeout_seconds': 900}}
+    vc = guild.add_channel(FakeChannel(guild, "busy", harness.category))
+    vc.members.append(harness.member(1))
+    for owner_id in range(100000):
+        registry.add(module.Session(owner_id, guild.id, vc.id))
+    lag, stop = [], asyncio.Event()
+
+    async def probe():
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            tick = loop.time()
+            await asyncio.sleep(0)
+            lag.append(loop.time() - tick)
+
+    prober = asyncio.get_running_loop().create_task(probe())
+    sweep = await cog.sweep_idle()
+    stop.set()
+    await prober
+    report['sweep_100k_ms'] = sweep['duration_seconds'] * 1000
+    report['sweep_max_stall_ms'] = max(lag) * 1000
+    return report
+
+
+async def compare_modes(args, module):
+    rows = []
+    for single_channel in (False, True):
+        mode_args = argparse.Namespace(**{**vars(args), 'single_channel': single_channel})
+        trace = channel_hopping(args.members, args.duration, random.Random(args.seed))
+        end = max(event['t'] for event in trace) + 1
+        trace += [{'t': end, 'member': m, 'channel': None} for m in range(1, args.members + 1)]
+        report = await run_trace("single-channel" if single_channel else "two-channel", trace, mode_args, module)
+        rows.append({
+            'scenario': f"mode_comparison: {report['scenario']}",
+            'sessions_created': report['sessions_created'],
+            'rest_calls': report['rest_calls'],
+            'rest_per_session': report['rest_per_session'],
+            'rest_by_route': report['rest_by_route'],
+            'join_p50_ms': report['join_p50_ms'],
+            'join_p99_ms': report['join_p99_ms'],
+            'sessions_live': report['sessions_live'],
+            'leaked_channels': report['leaked_channels'],
+        })
+    return rows
+
+
+async def compare_debounce(args, module):
+    rows = []
+    for window in (0.0, module.DEBOUNCE_WINDOW or 0.5):
+        window_args = argparse.Namespace(**{**vars(args), 'debounce': window})
+        trace = hop_spam(args.members, args.duration, random.Random(args.seed))
+        report = await run_trace(f"window {window:g}s", trace, window_args, module)
+        rows.append({key: report[key] for key in ('scenario', 'events', 'events_suppressed', 'hop_cooldowns', 'sessions_created',
+                                                  'rest_calls', 'rest_by_route', 'sessions_live', 'leaked_channels')})
+        rows[-1]['scenario'] = f"debounce_comparison: {report['scenario']}"
+    rows[-1]['rest_calls_suppressed'] = rows[0]['rest_calls'] - rows[-1]['rest_calls']
+    return rows
+
+
+def registry_benchmark(module, sizes=(10, 100, 1000, 10000, 100000), lookups=200000):
+    results = []
+    for size in sizes:
+        registry = module.SessionRegistry()
+        for owner_id in range(size):
+            registry.add(module.Session(owner_id, owner_id % 100, 10**6 + owner_id, 2 * 10**6 + owner_id, 3 * 10**6 + owner_id))
+        probes = [10**6 + random.randrange(size) for _ in range(lookups)]
+        started = time.perf_counter()
+        for channel_id in probes: registry.owner_of_channel(channel_id)
+        results.append({'sessions': size, 'ns_per_lookup': (time.perf_counter() - started) / lookups * 1e9})
+    return results
+
+
+def memory_benchmark(module, sessions=100000):
+    snowflake = 10**18
+
+    def measure(build):
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            records = build()
+            return (tracemalloc.get_traced_memory()[0] - baseline) / sessions, records
+        finally:
+            tracemalloc.stop()
+
+    def legacy_records():
+        return {i: {'voice_channel_id': snowflake + 3 * i, 'text_channel_id': snowflake + 3 * i + 1,
+                    'control_message_id': snowflake + 3 * i + 2, 'guild_id': snowflake + i % 100} for i in range(sessions)}
+
+    def slotted_records():
+        return {i: module.Session(i, snowflake + i % 100, snowflake + 3 * i, snowflake + 3 * i + 1, snowflake + 3 * i + 2)
+                for i in range(sessions)}
+
+    def registry():
+        registry = module.SessionRegistry()
+        for session in slotted_records().values(): registry.add(session)
+        return registry
+
+    legacy, _ = measure(legacy_records)
+    slotted, _ = measure(slotted_records)
+    indexed, _ = measure(registry)
+    return {'scenario': f"session memory @ {sessions} sessions", 'dict_bytes_per_session': legacy,
+            'slotted_bytes_per_session': slotted, 'saved_pct': (1 - slotted / legacy) * 100,
+            'registry_bytes_per_session': indexed}
+
+
+def print_report(report):
+    print(f"== {report['scenario']}")
+    for key, value in report.items():
+        if key == 'scenario': continue
+        print(f"  {key:<22} {value:.2f}" if isinstance(value, float) else f"  {key:<22} {value}")
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="all", choices=["all", "registry", "memory", "concurrent_create", "hop_cooldown", "reconcile_orphans", "mode_comparison", "debounce_comparison", "idle_sweep", "shared_state", *SCENARIOS])
+    parser.add_argument("--trace", help="Replay a recorded JSON-lines trace instead of a synthetic scenario.")
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of simulated activity.")
+    parser.add_argument("--latency", type=float, default=50.0, help="Mean fake REST latency in ms.")
+    parser.add_argument("--jitter", type=float, default=15.0, help="REST latency standard deviation in ms.")
+    parser.add_argument("--p429", type=float, default=0.0, help="Probability that a REST call is rate limited.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Seconds a rate-limited call waits before retrying.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability that a REST call fails outright.")
+    parser.add_argument("--grace", type=float, default=1.0, help="Empty-channel grace period in seconds.")
+    parser.add_argument("--pool-size", type=int, default=0)
+    parser.add_argument("--single-channel", action="store_true", help="Post panels in the voice channel chat instead of a text channel.")
+    parser.add_argument("--debounce", type=float, help="Override the per-member voice event coalescing window in seconds (0 disables).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON.")
+    args = parser.parse_args(argv)
+
+    module = load_cog_module()
+    reports = []
+    if args.trace:
+        with open(args.trace) as f:
+            trace = [json.loads(line) for line in f if line.strip()]
+        reports.append(await run_trace(os.path.basename(args.trace), trace, args, module))
+    else:
+        if args.scenario in ("all", "registry"):
+            for row in registry_benchmark(module):
+                reports.append({'scenario': f"registry lookup @ {row['sessions']} sessions", 'ns_per_lookup': row['ns_per_lookup']})
+        if args.scenario in ("all", "memory"):
+            reports.append(memory_benchmark(module, max(args.members, 100000)))
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario] if args.scenario in SCENARIOS else []
+        for name in names:
+            trace = SCENARIOS[name](args.members, args.duration, random.Random(args.seed))
+            reports.append(await run_trace(name, trace, args, module))
+        if args.scenario in ("all", "concurrent_create"):
+            reports.append(await run_concurrent_create(args, module))
+        if args.scenario in ("all", "hop_cooldown"):
+            reports.append(await run_hop_cooldown(args, module))
+        if args.scenario in ("all", "reconcile_orphans"):
+            reports.append(await run_reconcile(args, module))
+        if args.scenario in ("all", "mode_comparison"):
+            reports.extend(await compare_modes(args, module))
+        if args.scenario in ("all", "debounce_comparison"):
+            reports.extend(await compare_debounce(args, module))
+        if args.scenario in ("all", "idle_sweep"):
+            reports.append(await run_idle_sweep(args, module))
+        if args.scenario in ("all", "shared_state"):
+            reports.append(await run_shared_state(args, module))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports: print_report(report)
+    return reports
+
+
+if __name__ == "__main__":
+    failed = [report['scenario'] for report in asyncio.run(main(sys.argv[1:])) if report.get('passed') is False]
+    if failed: sys.exit(f"Failed checks: {', '.join(failed)}")